@@ -1,12 +1,58 @@
 from scrape import scrape_data
 from clean import clean_data
+from records import ApplicantRecord
+from columnar import write_columnar, read_json_records
+from checkpoint import OutputCheckpoint
+
+def _plain(record) -> dict:
+    return record.to_dict() if isinstance(record, ApplicantRecord) else record
 
 def save_data(records, path: str = "applicant_data.json") -> None:
     import json
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
+        json.dump([_plain(r) for r in records], f, ensure_ascii=False, indent=2)
+
+def save_jsonl(records, path: str = "applicant_data.jsonl", append: bool = False) -> int:
+    """Write records as JSON Lines one at a time; every line is flushed so partial output survives a crash."""
+    import json
+    count = 0
+    with open(path, "a" if append else "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(_plain(record), ensure_ascii=False))
+            f.write("\n")
+            f.flush()
+            count += 1
+    return count
 
 if __name__ == "__main__":
-    data = scrape_data(limit=30000)
-    cleaned = clean_data(data)
-    save_data(cleaned.data, "applicant_data.json")
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrape GradCafe results into applicant_data.jsonl.")
+    parser.add_argument("--backlog", action="store_true",
+                        help="Resume below earlier limit-capped runs instead of only fetching newer results")
+    args = parser.parse_args()
+
+    # stream scrape -> clean -> save so memory stays flat regardless of limit;
+    # the state file records which result_id ranges earlier runs fetched, so a
+    # re-run only fetches results newer than them (--backlog resumes where a
+    # limit-capped run stopped instead), and the checkpoint lets a crashed run
+    # resume where it stopped (results the crashed run already wrote to the
+    # output file are not fetched again)
+    checkpoint = OutputCheckpoint("scrape_checkpoint.json", "applicant_data.jsonl")
+    scraper = scrape_data(
+        limit=30000, workers=8, max_per_second=8.0, eager=False,
+        parser="lxml", strain=True, progress_every=30.0, compact=True,
+        state_path="scrape_state.json", persisted=checkpoint, backlog=args.backlog,
+    )
+    records = scraper.iter_records()
+    # batch cleaning adds typed gpa/gre/gre_v/gre_aw and ISO dates for the loader;
+    # each batch is written out as soon as it is cleaned (a crash re-fetches at
+    # most the batch in progress, see OutputCheckpoint)
+    save_jsonl(clean_data.stream(records, batch_size=200), "applicant_data.jsonl", append=True)
+    # only now is the last batch on disk, so the walked ranges can be marked done
+    scraper.commit_state()
+    checkpoint.close()
+    # applicant_data.jsonl is the standardizer's input: llm_hosting/app.py --file applicant_data.jsonl;
+    # compact columnar copy of the full output (dictionary-encoded, per-column zlib),
+    # streamed from the JSONL file one row group at a time so memory stays flat
+    write_columnar(read_json_records("applicant_data.jsonl"), "applicant_data.gcol")
@@ -0,0 +1,92 @@
+"""Compare HTML parser backends on saved survey/detail pages.
+
+Every backend must extract exactly the same fields as the default
+html.parser backend; the script exits non-zero if any page differs and
+otherwise prints the parse time per page for each backend.
+
+    python bench_parse.py fixtures/            # use pages already on disk
+    python bench_parse.py fixtures/ --fetch 5  # first save 5 live survey pages + their details
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+
+from scrape import scrape_data
+
+BACKENDS = [
+    ("html.parser", False),
+    ("html.parser", True),
+    ("lxml", False),
+    ("lxml", True),
+]
+
+
+def fetch_fixtures(root: str, pages: int) -> None:
+    """Record `pages` live survey pages and the detail page of every result on them under `root`."""
+    scraper = scrape_data(eager=False, workers=4, max_per_second=4.0, record_dir=root)
+    for _ in scraper.iter_records(end_page=pages):
+        pass
+
+
+def load_pages(root: str) -> tuple[list[bytes], list[tuple[str, bytes]]]:
+    survey, detail = [], []
+    for path in sorted(glob.glob(os.path.join(root, "survey", "*.html"))):
+        with open(path, "rb") as f:
+            survey.append(f.read())
+    for path in sorted(glob.glob(os.path.join(root, "result", "*.html"))):
+        rid = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "rb") as f:
+            detail.append((rid, f.read()))
+    return survey, detail
+
+
+def extract(scraper, survey, detail) -> tuple[list, list, float, float]:
+    t0 = time.perf_counter()
+    survey_out = [scraper.parse_survey_page(html) for html in survey]
+    t1 = time.perf_counter()
+    detail_out = [scraper.parse_detail_page(html, rid) for rid, html in detail]
+    t2 = time.perf_counter()
+    return survey_out, detail_out, t1 - t0, t2 - t1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark scraper HTML parser backends.")
+    parser.add_argument("fixtures", help="Directory holding survey/*.html and result/*.html")
+    parser.add_argument("--fetch", type=int, default=0, help="Download this many live survey pages first.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions per backend.")
+    args = parser.parse_args(argv)
+
+    if args.fetch:
+        fetch_fixtures(args.fixtures, args.fetch)
+    survey, detail = load_pages(args.fixtures)
+    if not survey and not detail:
+        print(f"no pages found under {args.fixtures}")
+        return 1
+    print(f"{len(survey)} survey pages, {len(detail)} detail pages")
+
+    baseline = None
+    ok = True
+    for name, strain in BACKENDS:
+        scraper = scrape_data(eager=False, parser=name, strain=strain)
+        best_s = best_d = float("inf")
+        for _ in range(max(1, args.repeat)):
+            survey_out, detail_out, ts, td = extract(scraper, survey, detail)
+            best_s, best_d = min(best_s, ts), min(best_d, td)
+        if baseline is None:
+            baseline = (survey_out, detail_out)
+        same = (survey_out, detail_out) == baseline
+        ok = ok and same
+        label = f"{name}{' +strainer' if strain else ''}"
+        print(
+            f"{label:<24} survey {1000 * best_s / max(1, len(survey)):7.2f} ms/page"
+            f"   detail {1000 * best_d / max(1, len(detail)):7.2f} ms/page"
+            f"   {'identical' if same else 'MISMATCH'}"
+        )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
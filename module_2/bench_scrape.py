@@ -0,0 +1,112 @@
+"""Offline scraper benchmark against a local replay of recorded GradCafe pages.
+
+    python bench_scrape.py record fixtures/ --pages 5     # capture live pages once
+    python bench_scrape.py run fixtures/ --scales 1000 10000 30000 --workers 8
+
+`run` serves the archive with replay.ReplayServer (repeating the recorded
+listing as often as needed for the largest scale) and, for every scale,
+reports records/sec and memory for:
+
+  survey   collect_survey_entries over enough pages for N results
+  detail   get_detail_fields for N result ids (via fetch_details)
+  e2e      iter_records, the streaming scrape app.py uses
+
+plus the average parse time per survey and detail page.
+"""
+
+import sys
+import time
+import argparse
+import tracemalloc
+
+from scrape import scrape_data
+from replay import ReplayServer
+
+
+def _measure(fn, memory: bool) -> tuple[float, int | None]:
+    if memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def _row(label: str, n: int, elapsed: float, peak: int | None, scraper) -> str:
+    snap = scraper.metrics.snapshot()
+    mem = f"{peak / 1e6:8.1f} MB" if peak is not None else "       -"
+    return (
+        f"{label:<7} {n:>6} records {n / elapsed:9.1f} rec/s  peak {mem}"
+        f"  parse {snap['parse_ms_survey']:6.2f} ms/survey {snap['parse_ms_detail']:6.2f} ms/detail"
+    )
+
+
+def run(archive: str, scales: list[int], workers: int, parser: str, strain: bool, memory: bool) -> None:
+    options = {"eager": False, "workers": workers, "parser": parser, "strain": strain}
+    probe = ReplayServer(archive)
+    per_page = len(scrape_data(eager=False).parse_survey_page(probe.survey_page(1))) if probe.pages else 0
+    if not per_page:
+        print(f"no recorded survey pages under {archive}")
+        return
+    recorded = per_page * len(probe.pages)
+    repeat = -(-max(scales) // recorded)
+    probe.stop()
+
+    with ReplayServer(archive, repeat=repeat) as server:
+        print(f"replaying {len(server.pages)} pages x {repeat} from {server.url} ({per_page} results/page)")
+        for n in scales:
+            s = scrape_data(base_url=server.url, **options)
+            links: list[dict] = []
+            elapsed, peak = _measure(
+                lambda: links.extend(s.collect_survey_entries(s.SURVEY_BASE, limit=n, delay=(0, 0))), memory
+            )
+            print(_row("survey", len(links), elapsed, peak, s))
+
+            d = scrape_data(base_url=server.url, **options)
+            rids = [row["result_id"] for row in links]
+            elapsed, peak = _measure(lambda: d.fetch_details(rids), memory)
+            print(_row("detail", len(rids), elapsed, peak, d))
+
+            e = scrape_data(base_url=server.url, **options)
+            count = [0]
+
+            def stream():
+                for _ in e.iter_records(limit=n):
+                    count[0] += 1
+
+            elapsed, peak = _measure(stream, memory)
+            print(_row("e2e", count[0], elapsed, peak, e))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Record/replay benchmark for the GradCafe scraper.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    rec = sub.add_parser("record", help="Record live survey/detail pages into an archive.")
+    rec.add_argument("archive")
+    rec.add_argument("--pages", type=int, default=5)
+
+    bench = sub.add_parser("run", help="Benchmark against a local replay of an archive.")
+    bench.add_argument("archive")
+    bench.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 30000])
+    bench.add_argument("--workers", type=int, default=8)
+    bench.add_argument("--parser", default="html.parser")
+    bench.add_argument("--strain", action="store_true")
+    bench.add_argument("--memory", action="store_true", help="Track peak Python memory (slower).")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "record":
+        s = scrape_data(eager=False, workers=4, max_per_second=4.0, record_dir=args.archive)
+        n = sum(1 for _ in s.iter_records(end_page=args.pages))
+        print(f"recorded {args.pages} survey pages and {n} results into {args.archive}")
+    else:
+        run(args.archive, args.scales, args.workers, args.parser, args.strain, args.memory)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
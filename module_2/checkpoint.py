@@ -0,0 +1,141 @@
+import os
+import json
+
+
+class ScrapeJournal:
+    """
+    Append-only JSON Lines journal of completed (survey row, detail record) pairs.
+
+    Each line is one result the consumer has taken. Lines are buffered and
+    flushed to disk every `flush_every` appends, so a crash loses at most that
+    many entries (their details are fetched again). Results whose detail
+    fetch failed are journaled but not treated as done, so a resumed run
+    retries them; `taken` still holds their ids for consumers that must not
+    see a result twice. For output that has to match exactly what was
+    scraped, use OutputCheckpoint instead.
+    """
+
+    def __init__(self, path: str, flush_every: int = 25):
+        self.path = path
+        self.flush_every = max(1, int(flush_every))
+        self.done: dict[str, tuple[dict, dict]] = {}
+        self.taken: set[str] = set()
+        self._pending = 0
+        self._load()
+        self._f = open(path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a torn final line from a crash mid-write
+                    continue
+                srec, drec = entry["survey"], entry["detail"]
+                self.taken.add(srec["result_id"])
+                if "detail_error" in drec:
+                    self.done.pop(srec["result_id"], None)
+                else:
+                    self.done[srec["result_id"]] = (srec, drec)
+
+    def __contains__(self, rid) -> bool:
+        return rid in self.done
+
+    def get(self, rid) -> tuple[dict, dict]:
+        return self.done[rid]
+
+    def append(self, srec: dict, drec: dict) -> None:
+        self.taken.add(srec["result_id"])
+        if "detail_error" in drec:
+            self.done.pop(srec["result_id"], None)
+        else:
+            self.done[srec["result_id"]] = (srec, drec)
+        self._f.write(json.dumps({"survey": srec, "detail": drec}, ensure_ascii=False))
+        self._f.write("\n")
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._pending = 0
+
+    def close(self, remove: bool = False) -> None:
+        """Flush and close; with `remove=True` the journal is deleted (the run finished)."""
+        if self._f.closed:
+            return
+        self.flush()
+        self._f.close()
+        if remove:
+            os.remove(self.path)
+
+
+class OutputCheckpoint:
+    """
+    Resume point for a run that appends records to the JSON Lines file `output`.
+
+    The output's size when the run starts is saved to `path`. After a crash,
+    every line past that offset was written by this run, so a resumed run
+    skips those result_ids (pass the checkpoint as `scrape_data(persisted=...)`).
+    A torn final line is cut off first. The output itself is the record of
+    progress, so a result is never written twice and never skipped unwritten.
+    """
+
+    def __init__(self, path: str, output: str):
+        self.path = path
+        self.output = os.path.abspath(output)
+        self.done: set[str] = set()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = None
+        if state and state.get("output") == self.output:
+            self.offset = int(state["offset"])
+            self._load()
+        else:
+            self.offset = os.path.getsize(output) if os.path.exists(output) else 0
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"output": self.output, "offset": self.offset}, f)
+            os.replace(tmp, path)
+
+    def _load(self) -> None:
+        try:
+            f = open(self.output, "rb+")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(self.offset)
+            good = self.offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    rid = json.loads(line).get("result_id")
+                except ValueError:
+                    break
+                if rid is not None:
+                    self.done.add(str(rid))
+                good += len(line)
+            # drop a line the crash cut short, so the next append starts clean
+            f.truncate(good)
+
+    def __contains__(self, rid) -> bool:
+        return str(rid) in self.done
+
+    def __len__(self) -> int:
+        return len(self.done)
+
+    def close(self) -> None:
+        """The run finished: forget the resume point."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -1,30 +1,217 @@
+from datetime import datetime
+
 from scrape import scrape_data
+from records import ApplicantRecord
 
 
 class clean_data:
-    def __init__(self, data):
+    # scraped label -> output key
+    RENAME_MAP = {
+        "result_url": "url",
+        "added_on": "date_added",
+        "Decision": "status",
+        "Institution": "university",
+        "Program": "program",
+        "Degree's Country of Origin": "US/International",
+        "Degree Type": "Degree"
+    }
+
+    # batch mode: low-cardinality text columns whose cleaned values are memoized
+    CACHED_COLUMNS = {
+        "term", "date_added", "status", "university", "program", "US/International", "Degree",
+        "Notification", "Undergrad GPA", "GRE General", "GRE Verbal", "Analytical Writing",
+    }
+    # batch mode: score label -> typed float key (also the loader's column name)
+    NUMERIC_COLUMNS = {
+        "Undergrad GPA": "gpa",
+        "GRE General": "gre",
+        "GRE Verbal": "gre_v",
+        "Analytical Writing": "gre_aw",
+    }
+    DATE_FORMAT = "%B %d, %Y"
+    _CACHE_LIMIT = 100000
+    _text_cache: dict = {}
+    _date_cache: dict = {}
+
+    def __init__(self, data, batch: bool = False):
         self.data = data.combined
-        self.clean()
+        if batch:
+            self.clean_batch(self.data)
+        else:
+            self.clean()
 
     def clean(self):
         for record in self.data:
-            # Clean text fields
-            for key, val in list(record.items()):
-                if isinstance(val, str):
-                    record[key] = " ".join(val.split()).strip()
+            self.clean_record(record)
+
+    @classmethod
+    def clean_record(cls, record):
+        """Clean one record (dict or ApplicantRecord) in place and return it."""
+        if isinstance(record, ApplicantRecord):
+            # slots already carry the output names, so only whitespace needs fixing
+            return record.clean()
+        # Clean text fields
+        for key, val in list(record.items()):
+            if isinstance(val, str):
+                record[key] = " ".join(val.split()).strip()
+
+        for old_key, new_key in cls.RENAME_MAP.items():
+            if old_key in record and new_key not in record:
+                record[new_key] = record.pop(old_key)
+        return record
+
+    @classmethod
+    def stream(cls, records, batch_size: int | None = None):
+        """
+        Lazily clean an iterable of records (e.g. scrape_data.iter_records()).
+        With `batch_size` records are cleaned `batch_size` at a time by
+        clean_batch (typed scores and ISO dates included).
+        """
+        if not batch_size:
+            for record in records:
+                yield cls.clean_record(record)
+            return
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= batch_size:
+                yield from cls.clean_batch(chunk)
+                chunk = []
+        if chunk:
+            yield from cls.clean_batch(chunk)
+
+    ##################################### batch cleaning #####################################
+
+    # batch mode: output key -> (memo of cleaned values, cleaner for a memo miss)
+    _COLUMN_CLEANERS: dict = {}
+    _score_cache: dict = {}
+    _MISS = object()
+
+    @classmethod
+    def clean_batch(cls, records: list) -> list:
+        """
+        Clean a chunk of records in place and return it.
+
+        Besides what clean_record does, this parses each score into a float
+        under its loader column name (gpa, gre, gre_v, gre_aw; 0 means "not
+        reported" and becomes None) and rewrites date_added as an ISO date.
+        Repetitive columns (term, status, university, scores, dates, ...) are
+        cleaned once per distinct value and memoized across batches, so each
+        record costs a few dict lookups.
+        """
+        if not cls._COLUMN_CLEANERS:
+            cleaners = {key: (cls._text_cache, cls._cached_text) for key in cls.CACHED_COLUMNS}
+            cleaners["date_added"] = (cls._date_cache, cls._iso_date)
+            cls._COLUMN_CLEANERS = cleaners
+        for record in records:
+            if isinstance(record, ApplicantRecord):
+                cls._clean_compact(record)
+            else:
+                cls._clean_dict(record)
+        return records
+
+    @classmethod
+    def _clean_value(cls, key: str, val):
+        if val.__class__ is not str:
+            return val
+        memo = cls._COLUMN_CLEANERS.get(key)
+        if memo is None:
+            return " ".join(val.split())
+        out = memo[0].get(val)
+        return out if out is not None else memo[1](val)
+
+    @classmethod
+    def _clean_dict(cls, record: dict) -> None:
+        # the hot loop of a scrape: lookups are inlined rather than calling _clean_value
+        rename, cleaners = cls.RENAME_MAP, cls._COLUMN_CLEANERS
+        out = {}
+        for key, val in record.items():
+            new_key = rename.get(key)
+            if new_key is not None and new_key not in record:
+                key = new_key
+            if val.__class__ is str:
+                memo = cleaners.get(key)
+                if memo is None:
+                    val = " ".join(val.split())
+                else:
+                    hit = memo[0].get(val)
+                    val = hit if hit is not None else memo[1](val)
+            out[key] = val
+        score = cls._score
+        for label, typed in cls.NUMERIC_COLUMNS.items():
+            out[typed] = score(out.get(label))
+        record.clear()
+        record.update(out)
+
+    @classmethod
+    def _clean_compact(cls, record: ApplicantRecord) -> None:
+        clean = cls._clean_value
+        for slot, key in ApplicantRecord._PAIRS:
+            val = getattr(record, slot)
+            if val.__class__ is str:
+                setattr(record, slot, clean(key, val))
+        score = cls._score
+        for slot, typed in ApplicantRecord.TYPED_SLOTS.items():
+            setattr(record, typed, score(getattr(record, slot)))
+        if record.extra:
+            for key, val in record.extra.items():
+                record.extra[key] = clean(key, val)
+
+    @staticmethod
+    def _squash(v):
+        """Collapse whitespace; returns the same object when nothing changes."""
+        if not isinstance(v, str):
+            return v
+        out = " ".join(v.split())
+        return v if out == v else out
+
+    @classmethod
+    def _cached_text(cls, v):
+        if not isinstance(v, str):
+            return v
+        cache = cls._text_cache
+        out = cache.get(v)
+        if out is None:
+            if len(cache) >= cls._CACHE_LIMIT:
+                cache.clear()
+            out = cache[v] = cls._squash(v)
+        return out
+
+    @classmethod
+    def _iso_date(cls, v):
+        """'September 06, 2025' -> '2025-09-06'; anything unparseable is just whitespace-cleaned."""
+        if not isinstance(v, str):
+            return v
+        cache = cls._date_cache
+        out = cache.get(v)
+        if out is None:
+            if len(cache) >= cls._CACHE_LIMIT:
+                cache.clear()
+            text = " ".join(v.split())
+            try:
+                out = datetime.strptime(text, cls.DATE_FORMAT).date().isoformat()
+            except ValueError:
+                out = text
+            cache[v] = out
+        return out
+
+    @staticmethod
+    def _parse_score(v) -> float | None:
+        try:
+            num = float(v)
+        except (TypeError, ValueError):
+            return None
+        return num if num else None
 
-            rename_map = {
-                "result_url": "url",
-                "added_on": "date_added",
-                "Decision": "status",
-                "Institution": "university",
-                "Program": "program",
-                "Degree's Country of Origin": "US/International",
-                "Degree Type": "Degree"
-            }
-            for old_key, new_key in rename_map.items():
-                if old_key in record and new_key not in record:
-                    record[new_key] = record.pop(old_key)
+    @classmethod
+    def _score(cls, v) -> float | None:
+        cache = cls._score_cache
+        out = cache.get(v, cls._MISS)
+        if out is cls._MISS:
+            if len(cache) >= cls._CACHE_LIMIT:
+                cache.clear()
+            out = cache[v] = cls._parse_score(v)
+        return out
 
 
 
@@ -34,4 +221,4 @@ class clean_data:
 if __name__ == "__main__":
     data = scrape_data(limit=40)
     cleaned = clean_data(data)
-    print(cleaned.data)  # print first two records
\ No newline at end of file
+    print(cleaned.data)  # print first two records
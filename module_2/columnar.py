@@ -0,0 +1,272 @@
+"""Compact columnar export of applicant records.
+
+File layout:
+
+    b"GCOL2\\n"
+    8-byte little-endian header length
+    JSON header: {"rows": n, "byteorder": ..., "columns": [names],
+                  "groups": [{"rows": r, "columns": {name: {"kind", "offset", "length", ...}}}]}
+    one zlib-compressed block per column per row group
+
+Records are written in row groups of up to `group_rows` rows, so the writer
+holds one group in memory however large the input is. Every column of a group
+is encoded on its own:
+
+  dict   values listed once, rows stored as array indexes (status, term, program, ...)
+  float  array('d'), NaN for missing (typed gpa/gre/gre_v/gre_aw from clean_batch)
+  text   JSON list of strings/None
+
+The header carries every block's offset, so `ColumnarReader.column(name)`
+reads and decompresses only that column. Files from the single-group GCOL1
+layout are still readable.
+
+    python columnar.py applicant_data.jsonl applicant_data.gcol
+"""
+
+import io
+import os
+import sys
+import json
+import math
+import zlib
+import shutil
+import struct
+import argparse
+from array import array
+
+MAGIC = b"GCOL2\n"
+MAGIC_V1 = b"GCOL1\n"
+GROUP_ROWS = 50000
+
+# repetitive fields stored as a value dictionary + per-row indexes
+DICT_COLUMNS = {
+    "term", "status", "program", "university", "date_added",
+    "US/International", "Degree", "Notification",
+}
+# typed scores from clean_data.clean_batch
+FLOAT_COLUMNS = {"gpa", "gre", "gre_v", "gre_aw"}
+
+
+def _plain(record) -> dict:
+    return record.to_dict() if hasattr(record, "to_dict") else record
+
+
+def _index_typecode(size: int) -> str:
+    if size <= 0xFF:
+        return "B"
+    if size <= 0xFFFF:
+        return "H"
+    return "I"
+
+
+def _encode(kind: str, values: list) -> tuple[bytes, dict]:
+    """Serialize one column; returns the raw block and extra header fields."""
+    if kind == "float":
+        nan = math.nan
+        return array("d", [nan if v is None else float(v) for v in values]).tobytes(), {}
+    if kind == "dict":
+        lookup: dict = {}
+        indexes = [lookup.setdefault(v, len(lookup)) for v in values]
+        typecode = _index_typecode(len(lookup))
+        words = json.dumps(list(lookup), ensure_ascii=False).encode("utf-8")
+        return struct.pack("<I", len(words)) + words + array(typecode, indexes).tobytes(), {"index": typecode}
+    return json.dumps(values, ensure_ascii=False).encode("utf-8"), {}
+
+
+def _kind(name: str, values: list) -> str:
+    if name in FLOAT_COLUMNS and all(v is None or isinstance(v, (int, float)) for v in values):
+        return "float"
+    if name in DICT_COLUMNS and all(v is None or isinstance(v, str) for v in values):
+        return "dict"
+    return "text"
+
+
+def _write_group(f, records: list, level: int) -> dict:
+    """Encode one row group's columns into `f` (offsets relative to the data start)."""
+    columns: dict[str, list] = {}
+    rows = 0
+    for record in records:
+        for name, val in record.items():
+            col = columns.get(name)
+            if col is None:
+                # field first seen on this row: earlier rows did not have it
+                col = columns[name] = [None] * rows
+            col.append(val)
+        rows += 1
+        for col in columns.values():
+            if len(col) < rows:
+                col.append(None)
+
+    meta = {}
+    for name, values in columns.items():
+        kind = _kind(name, values)
+        raw, extra = _encode(kind, values)
+        block = zlib.compress(raw, level)
+        meta[name] = {"kind": kind, "offset": f.tell(), "length": len(block), "raw": len(raw), **extra}
+        f.write(block)
+    return {"rows": rows, "columns": meta}
+
+
+def write_columnar(records, path: str = "applicant_data.gcol", level: int = 6, group_rows: int = GROUP_ROWS) -> int:
+    """
+    Write records (dicts or ApplicantRecords) as a columnar file; returns the row count.
+    Blocks are spooled to a temporary file one row group at a time, then put
+    behind the header, so memory stays bounded by `group_rows` records.
+    """
+    groups, names = [], {}
+    rows = 0
+    data_path, tmp = f"{path}.data.tmp", f"{path}.tmp"
+    try:
+        with open(data_path, "w+b") as data:
+            batch = []
+            for record in records:
+                batch.append(_plain(record))
+                if len(batch) >= group_rows:
+                    groups.append(_write_group(data, batch, level))
+                    batch = []
+            if batch or not groups:
+                groups.append(_write_group(data, batch, level))
+            for group in groups:
+                rows += group["rows"]
+                names.update(dict.fromkeys(group["columns"]))
+
+            header = json.dumps(
+                {"rows": rows, "byteorder": sys.byteorder, "columns": list(names), "groups": groups}
+            ).encode("utf-8")
+            with open(tmp, "wb") as f:
+                f.write(MAGIC)
+                f.write(struct.pack("<Q", len(header)))
+                f.write(header)
+                data.seek(0)
+                shutil.copyfileobj(data, f)
+        os.replace(tmp, path)
+    finally:
+        for leftover in (data_path, tmp):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return rows
+
+
+class ColumnarReader:
+    """
+    Lazy reader for files written by `write_columnar`.
+
+    Opening a file only reads its header; `column()` seeks to and decodes a
+    single column, and `iter_rows()` decodes just the columns asked for.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        magic = self._f.read(len(MAGIC))
+        if magic not in (MAGIC, MAGIC_V1):
+            self._f.close()
+            raise ValueError(f"{path} is not a columnar applicant file")
+        (size,) = struct.unpack("<Q", self._f.read(8))
+        header = json.loads(self._f.read(size))
+        self._data_start = len(MAGIC) + 8 + size
+        self.rows: int = header["rows"]
+        self._swap = header["byteorder"] != sys.byteorder
+        if magic == MAGIC_V1:
+            # one group holding every row
+            cols = {c["name"]: c for c in header["columns"]}
+            header["columns"], header["groups"] = list(cols), [{"rows": self.rows, "columns": cols}]
+        self._names: list[str] = header["columns"]
+        self._groups: list[dict] = header["groups"]
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self._names)
+
+    def _array(self, typecode: str, raw) -> array:
+        arr = array(typecode)
+        arr.frombytes(raw)
+        if self._swap:
+            arr.byteswap()
+        return arr
+
+    def _decode(self, meta: dict) -> list:
+        self._f.seek(self._data_start + meta["offset"])
+        raw = zlib.decompress(self._f.read(meta["length"]))
+        if meta["kind"] == "float":
+            return [None if math.isnan(v) else v for v in self._array("d", raw)]
+        if meta["kind"] == "dict":
+            buf = io.BytesIO(raw)
+            (size,) = struct.unpack("<I", buf.read(4))
+            words = json.loads(buf.read(size))
+            return [words[i] for i in self._array(meta["index"], buf.read())]
+        return json.loads(raw)
+
+    def column(self, name: str) -> list:
+        """Decode one column to a list of values (None where the field was missing)."""
+        if name not in self._names:
+            raise KeyError(name)
+        out: list = []
+        for group in self._groups:
+            meta = group["columns"].get(name)
+            out.extend(self._decode(meta) if meta is not None else [None] * group["rows"])
+        return out
+
+    def iter_rows(self, columns: list[str] | None = None):
+        """Yield one dict per row over `columns` (default all), omitting missing fields."""
+        names = list(columns) if columns is not None else self.columns
+        data = [self.column(name) for name in names]
+        for values in zip(*data):
+            yield {name: val for name, val in zip(names, values) if val is not None}
+
+    def stats(self) -> list[dict]:
+        """Per-column kind(s) and stored vs uncompressed size, summed over row groups."""
+        out = {name: {"name": name, "kind": None, "bytes": 0, "raw": 0} for name in self._names}
+        for group in self._groups:
+            for name, meta in group["columns"].items():
+                col = out[name]
+                kinds = col["kind"].split("/") if col["kind"] else []
+                if meta["kind"] not in kinds:
+                    col["kind"] = "/".join(kinds + [meta["kind"]])
+                col["bytes"] += meta["length"]
+                col["raw"] += meta["raw"]
+        return list(out.values())
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def read_json_records(path: str):
+    """Yield records from a JSON array (save_data) or JSON Lines (save_jsonl) file."""
+    with open(path, encoding="utf-8") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert applicant JSON/JSONL to the columnar format.")
+    parser.add_argument("source", help="applicant_data.json or applicant_data.jsonl")
+    parser.add_argument("target", help="Output .gcol file")
+    parser.add_argument("--level", type=int, default=6, help="zlib compression level")
+    args = parser.parse_args(argv)
+
+    rows = write_columnar(read_json_records(args.source), args.target, level=args.level)
+    with ColumnarReader(args.target) as reader:
+        for col in reader.stats():
+            print(f"{col['name']:<28} {col['kind']:<5} {col['raw']:>10} -> {col['bytes']:>9} bytes")
+    print(f"wrote {rows} rows to {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+
+class CachedResponse:
+    """Minimal stand-in for urllib3's HTTPResponse when a body is served from disk."""
+
+    def __init__(self, status: int, data: bytes, headers: dict):
+        self.status = status
+        self.data = data
+        self.headers = headers
+
+
+class CachedHTTP:
+    """
+    On-disk cache wrapped around a urllib3 PoolManager, keyed by URL.
+
+    Only GET requests are cached. An entry younger than `ttl` seconds is served
+    without touching the network; an older one is revalidated with
+    If-None-Match / If-Modified-Since and reused on a 304. URLs starting with
+    one of `revalidate_prefixes` are always revalidated (listing pages change
+    as new results arrive). Once the cache grows past `max_bytes` the least
+    recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        http,
+        cache_dir: str,
+        ttl: float = 86400.0,
+        max_bytes: int = 512 * 1024 * 1024,
+        revalidate_prefixes: tuple[str, ...] = (),
+    ):
+        self.http = http
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.revalidate_prefixes = revalidate_prefixes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(os.path.getsize(p) for p in self._bodies())
+
+    def request(self, method: str, url: str, headers: dict | None = None, **kw):
+        if method.upper() != "GET":
+            return self.http.request(method, url, headers=headers, **kw)
+
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        meta = self._load_meta(key)
+        if meta is not None:
+            always = url.startswith(self.revalidate_prefixes) if self.revalidate_prefixes else False
+            if not always and time.time() - meta["stored"] < self.ttl:
+                body = self._read_body(key)
+                if body is not None:
+                    self._count("hits")
+                    return CachedResponse(200, body, meta["headers"])
+
+        req_headers = dict(headers or {})
+        if meta is not None:
+            if meta["headers"].get("ETag"):
+                req_headers["If-None-Match"] = meta["headers"]["ETag"]
+            if meta["headers"].get("Last-Modified"):
+                req_headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+
+        r = self.http.request(method, url, headers=req_headers, **kw)
+
+        if r.status == 304 and meta is not None:
+            body = self._read_body(key)
+            if body is not None:
+                self._count("revalidated")
+                meta["stored"] = time.time()
+                self._write_meta(key, meta)
+                return CachedResponse(200, body, meta["headers"])
+
+        self._count("misses")
+        if r.status == 200:
+            kept = {h: r.headers.get(h) for h in ("ETag", "Last-Modified") if r.headers.get(h)}
+            self._store(key, url, r.data, kept)
+        return r
+
+    def _count(self, name: str) -> None:
+        # request() runs on every detail worker thread at once
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    # ---------------- storage ----------------
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def _bodies(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".body"):
+                yield os.path.join(self.cache_dir, name)
+
+    def _load_meta(self, key: str) -> dict | None:
+        try:
+            with open(self._path(key, "json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _tmp(self, key: str, ext: str) -> str:
+        # per-thread name, so two workers storing the same URL never share a temp file
+        return self._path(key, f"{ext}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+    def _write_meta(self, key: str, meta: dict) -> None:
+        tmp = self._tmp(key, "json")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path(key, "json"))
+
+    def _read_body(self, key: str) -> bytes | None:
+        path = self._path(key, "body")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # mtime doubles as the last-access time for LRU eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # evicted by another thread since the read; the body is still good
+            pass
+        return data
+
+    def _store(self, key: str, url: str, data: bytes, headers: dict) -> None:
+        path = self._path(key, "body")
+        tmp = self._tmp(key, "body")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        with self._lock:
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)
+            self._size += len(data) - old
+        self._write_meta(key, {"url": url, "stored": time.time(), "headers": headers})
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is back under 90% of max_bytes."""
+        with self._lock:
+            entries = []
+            for path in self._bodies():
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+            entries.sort()
+            target = self.max_bytes * 0.9
+            for _, size, path in entries:
+                if self._size <= target:
+                    break
+                for p in (path, path[: -len(".body")] + ".json"):
+                    try:
+                        os.remove(p)
+                    except FileNotFoundError:
+                        pass
+                self._size -= size
@@ -8,7 +8,7 @@ import os
 import re
 import sys
 import difflib
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Tuple
 
 from flask import Flask, jsonify, request
 from huggingface_hub import hf_hub_download
@@ -285,15 +285,25 @@ def standardize() -> Any:
     return jsonify({"rows": out})
 
 
+def _read_rows(in_path: str) -> Iterator[Dict[str, Any]]:
+    """Yield input rows from a JSON file, or lazily from a JSON Lines file (*.jsonl)."""
+    with open(in_path, "r", encoding="utf-8") as f:
+        if not in_path.endswith(".jsonl"):
+            yield from _normalize_input(json.load(f))
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
 def _cli_process_file(
     in_path: str,
     out_path: str | None,
     append: bool,
     to_stdout: bool,
 ) -> None:
-    """Process a JSON file and write JSONL incrementally."""
-    with open(in_path, "r", encoding="utf-8") as f:
-        rows = _normalize_input(json.load(f))
+    """Process a JSON or JSON Lines file and write JSONL incrementally."""
+    rows = _read_rows(in_path)
 
     sink = sys.stdout if to_stdout else None
     if not to_stdout:
@@ -326,7 +336,7 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "--file",
-        help="Path to JSON input (list of rows or {'rows': [...]})",
+        help="Path to JSON input (list of rows or {'rows': [...]}) or JSON Lines (*.jsonl)",
         default=None,
     )
     parser.add_argument(
@@ -0,0 +1,112 @@
+import time
+import threading
+from collections import deque
+
+
+class ScrapeMetrics:
+    """
+    Thread-safe counters and timings for one scrape run.
+
+    Fetch latencies are kept in a bounded window (the last `window` requests)
+    for p50/p95. When `progress_every` is set, `tick()` hands a `snapshot()` to
+    `on_progress` (or prints `format()` if no callback was given) at most once
+    per `progress_every` seconds.
+    """
+
+    def __init__(self, on_progress=None, progress_every: float | None = None, window: int = 10000):
+        self.on_progress = on_progress
+        self.progress_every = progress_every
+        self.started = time.monotonic()
+        self._last_report = self.started
+        self._lock = threading.Lock()
+        self._latency: deque = deque(maxlen=window)
+        self.pages = 0
+        self.records = 0
+        self.requests = 0
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+        self.parse_seconds = {"survey": 0.0, "detail": 0.0}
+        self.parse_count = {"survey": 0, "detail": 0}
+
+    def record_fetch(self, seconds: float, nbytes: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes += nbytes
+            self._latency.append(seconds)
+
+    def record_parse(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            self.parse_seconds[kind] += seconds
+            self.parse_count[kind] += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def record_page(self) -> None:
+        with self._lock:
+            self.pages += 1
+        self.tick()
+
+    def record_record(self) -> None:
+        with self._lock:
+            self.records += 1
+        self.tick()
+
+    @staticmethod
+    def _percentile(ordered: list[float], q: float) -> float | None:
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = max(1e-9, time.monotonic() - self.started)
+            ordered = sorted(self._latency)
+            return {
+                "elapsed": elapsed,
+                "pages": self.pages,
+                "records": self.records,
+                "pages_per_sec": self.pages / elapsed,
+                "records_per_sec": self.records / elapsed,
+                "requests": self.requests,
+                "fetch_p50": self._percentile(ordered, 0.50),
+                "fetch_p95": self._percentile(ordered, 0.95),
+                "parse_ms_survey": 1000 * self.parse_seconds["survey"] / max(1, self.parse_count["survey"]),
+                "parse_ms_detail": 1000 * self.parse_seconds["detail"] / max(1, self.parse_count["detail"]),
+                "bytes": self.bytes,
+                "retries": self.retries,
+                "errors": self.errors,
+            }
+
+    @staticmethod
+    def format(snap: dict) -> str:
+        def ms(v):
+            return f"{1000 * v:.0f}ms" if v is not None else "-"
+        return (
+            f"[{snap['elapsed']:.0f}s] {snap['pages']} pages ({snap['pages_per_sec']:.2f}/s), "
+            f"{snap['records']} records ({snap['records_per_sec']:.2f}/s), "
+            f"fetch p50 {ms(snap['fetch_p50'])} p95 {ms(snap['fetch_p95'])}, "
+            f"parse {snap['parse_ms_survey']:.1f}ms/survey {snap['parse_ms_detail']:.1f}ms/detail, "
+            f"{snap['bytes'] / 1e6:.1f} MB, {snap['retries']} retries, {snap['errors']} errors"
+        )
+
+    def tick(self, force: bool = False) -> None:
+        """Report progress if `progress_every` seconds have passed (or `force`)."""
+        if not self.progress_every and not force:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_report < self.progress_every:
+                return
+            self._last_report = now
+        snap = self.snapshot()
+        if self.on_progress is not None:
+            self.on_progress(snap)
+        else:
+            print(self.format(snap))
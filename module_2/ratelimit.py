@@ -0,0 +1,75 @@
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that adapts its refill rate to the server.
+
+    Requests take one token each; tokens refill at `rate` per second up to
+    `burst`. `penalize()` halves the rate (never below `min_rate`) when the
+    server pushes back with 429/503, and `reward()` creeps it back up towards
+    `max_rate` after each success, so the scraper settles near the highest
+    rate the site tolerates.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, min_rate: float = 0.2):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(min_rate, self.max_rate)
+        self.burst = float(burst) if burst is not None else max(1.0, self.rate)
+        self.tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self) -> None:
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def reward(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with jitter: a random wait in [d/2, d] where d = base * 2**attempt."""
+    d = min(cap, base * (2 ** attempt))
+    return random.uniform(d / 2, d)
+
+
+def retry_after_seconds(headers) -> float | None:
+    """Parse a Retry-After header given as seconds or an HTTP date; None if absent or unparseable."""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,111 @@
+class ApplicantRecord:
+    """
+    Fixed-schema applicant record stored in __slots__.
+
+    A merged survey + detail dict repeats long keys such as
+    "Degree's Country of Origin" in every record; here each field is a slot,
+    so a record costs a fixed handful of pointers. Slots are named after the
+    cleaned output keys, so cleaning never renames anything. Labels the
+    schema does not know about are kept in `extra`.
+    """
+
+    # scraped key (survey row or detail-page label) -> slot
+    FIELDS = {
+        "result_id": "result_id",
+        "result_url": "url",
+        "added_on": "date_added",
+        "term": "term",
+        "Decision": "status",
+        "Institution": "university",
+        "Program": "program",
+        "Degree's Country of Origin": "us_or_international",
+        "Degree Type": "degree",
+        "Notification": "notification",
+        "Undergrad GPA": "gpa",
+        "GRE General": "gre",
+        "GRE Verbal": "gre_v",
+        "Analytical Writing": "gre_aw",
+        "Notes": "notes",
+        "detail_error": "detail_error",
+    }
+
+    # slot -> key in the JSON output (same keys clean_data produces for dicts)
+    OUTPUT_KEYS = {
+        "result_id": "result_id",
+        "term": "term",
+        "url": "url",
+        "date_added": "date_added",
+        "status": "status",
+        "university": "university",
+        "program": "program",
+        "us_or_international": "US/International",
+        "degree": "Degree",
+        "notification": "Notification",
+        "gpa": "Undergrad GPA",
+        "gre": "GRE General",
+        "gre_v": "GRE Verbal",
+        "gre_aw": "Analytical Writing",
+        "notes": "Notes",
+        "detail_error": "detail_error",
+        # typed scores filled in by clean_data.clean_batch
+        "gpa_num": "gpa",
+        "gre_num": "gre",
+        "gre_v_num": "gre_v",
+        "gre_aw_num": "gre_aw",
+    }
+
+    # score slot -> typed float slot
+    TYPED_SLOTS = {"gpa": "gpa_num", "gre": "gre_num", "gre_v": "gre_v_num", "gre_aw": "gre_aw_num"}
+
+    # survey fields are always present in output, even when empty
+    ALWAYS = ("result_id", "term", "url", "date_added")
+
+    __slots__ = tuple(OUTPUT_KEYS) + ("extra",)
+
+    _PAIRS = tuple(OUTPUT_KEYS.items())
+
+    def __init__(self, **fields):
+        for slot in self.__slots__:
+            setattr(self, slot, fields.get(slot))
+
+    @classmethod
+    def from_parts(cls, *parts: dict) -> "ApplicantRecord":
+        """Build a record from scraped dicts (survey row, detail record); later parts win."""
+        rec = cls()
+        fields = cls.FIELDS
+        for part in parts:
+            for key, val in part.items():
+                slot = fields.get(key)
+                if slot is not None:
+                    setattr(rec, slot, val)
+                else:
+                    if rec.extra is None:
+                        rec.extra = {}
+                    rec.extra[key] = val
+        return rec
+
+    def clean(self) -> "ApplicantRecord":
+        """Collapse whitespace in every text field, in place."""
+        for slot, _ in self._PAIRS:
+            val = getattr(self, slot)
+            if isinstance(val, str):
+                setattr(self, slot, " ".join(val.split()))
+        if self.extra:
+            for key, val in self.extra.items():
+                if isinstance(val, str):
+                    self.extra[key] = " ".join(val.split())
+        return self
+
+    def to_dict(self) -> dict:
+        out = {key: getattr(self, key) for key in self.ALWAYS}
+        for slot, key in self._PAIRS:
+            val = getattr(self, slot)
+            if val is not None:
+                out[key] = val
+        if self.extra:
+            for key, val in self.extra.items():
+                out.setdefault(key, val)
+        return out
+
+    def __repr__(self) -> str:
+        return f"ApplicantRecord({self.to_dict()!r})"
@@ -0,0 +1,168 @@
+"""Record GradCafe responses to a fixture archive and serve them back locally.
+
+Archive layout (shared with bench_parse.py):
+
+    <archive>/survey/page-<n>.html
+    <archive>/result/<result_id>.html
+
+`RecordingHTTP` wraps the scraper's PoolManager and saves every 200 survey
+or detail response it sees (`scrape_data(record_dir=...)`). `ReplayServer`
+is a local stand-in for thegradcafe.com that serves an archive; point a
+scraper at it with `scrape_data(base_url=server.url)`. With `repeat` > 1 the
+recorded survey pages are served again and again with shifted result_ids,
+so a small archive can stand in for a 30k-record listing.
+"""
+
+import os
+import re
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+SURVEY_PATH_RE = re.compile(r"/survey/?$")
+RESULT_PATH_RE = re.compile(r"/result/(\d+)/?$")
+RESULT_HREF_RE = re.compile(rb"/result/(\d+)")
+
+# result_ids in repeated listing copies are shifted by multiples of this
+ID_STRIDE = 10_000_000
+
+
+def archive_path(root: str, url: str) -> str | None:
+    """Map a survey or detail URL to its file in the archive (None for anything else)."""
+    parts = urlsplit(url)
+    if SURVEY_PATH_RE.search(parts.path):
+        page = parse_qs(parts.query).get("page", ["1"])[0]
+        return os.path.join(root, "survey", f"page-{page}.html")
+    m = RESULT_PATH_RE.search(parts.path)
+    if m:
+        return os.path.join(root, "result", f"{m.group(1)}.html")
+    return None
+
+
+class RecordingHTTP:
+    """Pass requests through to `http` and save successful survey/detail bodies under `root`."""
+
+    def __init__(self, http, root: str):
+        self.http = http
+        self.root = root
+        os.makedirs(os.path.join(root, "survey"), exist_ok=True)
+        os.makedirs(os.path.join(root, "result"), exist_ok=True)
+
+    def request(self, method: str, url: str, **kw):
+        r = self.http.request(method, url, **kw)
+        path = archive_path(self.root, url)
+        if r.status == 200 and path is not None:
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(r.data)
+            os.replace(tmp, path)
+        return r
+
+
+class ReplayServer:
+    """
+    Serve an archive over HTTP on 127.0.0.1 from a background thread.
+
+    Survey page n maps to recorded page ((n - 1) % pages) + 1, with every
+    result_id in copy k shifted by k * ID_STRIDE; pages past `repeat` copies
+    come back empty, which ends a scrape. Detail requests for shifted ids are
+    answered from the original recording.
+    """
+
+    def __init__(self, root: str, repeat: int = 1, port: int = 0):
+        self.root = root
+        self.repeat = max(1, int(repeat))
+        survey_dir = os.path.join(root, "survey")
+        pages = []
+        for name in os.listdir(survey_dir):
+            m = re.fullmatch(r"page-(\d+)\.html", name)
+            if m:
+                pages.append(int(m.group(1)))
+        pages.sort()
+        self.pages = []
+        for n in pages:
+            with open(os.path.join(survey_dir, f"page-{n}.html"), "rb") as f:
+                self.pages.append(f.read())
+        self._details: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def total_pages(self) -> int:
+        return len(self.pages) * self.repeat
+
+    def survey_page(self, n: int) -> bytes:
+        if not self.pages or n < 1 or n > self.total_pages:
+            return b"<html><body><table><tbody></tbody></table></body></html>"
+        copy, index = divmod(n - 1, len(self.pages))
+        body = self.pages[index]
+        if copy:
+            shift = copy * ID_STRIDE
+            body = RESULT_HREF_RE.sub(lambda m: b"/result/%d" % (int(m.group(1)) + shift), body)
+        return body
+
+    def detail_page(self, rid: int) -> bytes | None:
+        key = str(rid % ID_STRIDE)
+        with self._lock:
+            if key not in self._details:
+                try:
+                    with open(os.path.join(self.root, "result", f"{key}.html"), "rb") as f:
+                        self._details[key] = f.read()
+                except FileNotFoundError:
+                    self._details[key] = None
+            return self._details[key]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                body = None
+                if SURVEY_PATH_RE.search(parts.path):
+                    page = parse_qs(parts.query).get("page", ["1"])[0]
+                    body = server.survey_page(int(page)) if page.isdigit() else None
+                else:
+                    m = RESULT_PATH_RE.search(parts.path)
+                    if m:
+                        body = server.detail_page(int(m.group(1)))
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
@@ -1,9 +1,19 @@
 
+import os
 import re
+import json
 import time
 import random
 import urllib3
-from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
+from http_cache import CachedHTTP
+from checkpoint import ScrapeJournal
+from metrics import ScrapeMetrics
+from replay import RecordingHTTP
+from records import ApplicantRecord
+from ratelimit import TokenBucket, backoff_delay, retry_after_seconds
 from urllib.parse import urljoin
 
 class scrape_data:
@@ -21,43 +31,217 @@ class scrape_data:
     _http = urllib3.PoolManager()
     _HEADERS = {"User-Agent": "Mozilla/5.0"}
 
-    def __init__(self, limit: int | None = None):
+    # statuses worth retrying; 429/503 also slow the token bucket down
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    THROTTLE_STATUSES = {429, 503}
+
+    # with strain=True only the parts of each page the extractors read are parsed
+    _STRAINERS = {
+        "survey": SoupStrainer("tbody"),
+        "detail": SoupStrainer(["dl", "ul"]),
+    }
+
+    def __init__(
+        self,
+        limit: int | None = None,
+        workers: int = 1,
+        max_per_second: float | None = None,
+        eager: bool = True,
+        state_path: str | None = None,
+        cache_dir: str | None = None,
+        cache_ttl: float = 86400.0,
+        checkpoint_path: str | None = None,
+        checkpoint_every: int = 25,
+        parser: str = "html.parser",
+        strain: bool = False,
+        max_retries: int = 4,
+        backoff: float = 1.0,
+        on_progress=None,
+        progress_every: float | None = None,
+        base_url: str | None = None,
+        record_dir: str | None = None,
+        compact: bool = False,
+        persisted=None,
+        backlog: bool = False,
+    ):
         """
         Create a scraper instance which immediately:
          1) collects up to `limit` survey entries
          2) fetches detail pages for each collected result
          3) merges survey + detail
+
+        `workers` caps how many detail requests are in flight at once and
+        `max_per_second` caps the request rate against the site (None = no cap);
+        the cap adapts downwards when the site answers 429/503. Failed requests
+        are retried up to `max_retries` times with exponential backoff starting
+        at `backoff` seconds, honoring Retry-After.
+        With `eager=False` nothing is fetched up front; use `iter_records()`
+        to stream merged records with constant memory instead.
+        With `state_path` set, the result_id ranges every run has walked are
+        saved there by commit_state(), which the consumer calls once it has
+        stored every record. A run fetches only what is newer than the newest saved
+        id and stops on the first page that reaches it. With `backlog=True`
+        the run instead walks the listing past the saved ranges and fetches
+        the gaps between them, so a run cut short by `limit` can be resumed
+        below where it stopped.
+        With `cache_dir` set, responses are cached on disk (see CachedHTTP) so
+        re-runs and resumed runs mostly skip the network.
+        With `checkpoint_path` set, results the consumer has taken are
+        journaled every `checkpoint_every` records and a restarted run reuses
+        their details. `persisted` is a container of result_ids the consumer
+        already saved (e.g. checkpoint.OutputCheckpoint); those are walked
+        past without being fetched or yielded.
+        `parser` picks the BeautifulSoup tree builder ("html.parser" or "lxml")
+        and `strain=True` builds only the table body / dl / ul subtrees
+        (bench_parse.py checks both give the same fields as the default).
+        Throughput, latency, parse time, bytes, retries and errors are tracked
+        in `self.metrics`; with `progress_every` seconds set, a snapshot is
+        passed to `on_progress` (or printed) periodically and at the end.
+        `base_url` points the scraper at another host (e.g. a replay.ReplayServer)
+        and `record_dir` saves every survey/detail page fetched into a fixture
+        archive for offline replay.
+        With `compact=True` merged records are ApplicantRecord objects
+        (fixed __slots__ schema) instead of dicts.
         """
-        # run the two-stage workflow as part of initialization
-        self.links = self.collect_survey_entries(self.SURVEY_BASE, limit=limit)
-        # fetch details for each link
+        if base_url:
+            self.BASE = base_url.rstrip("/")
+            self.SURVEY_BASE = f"{self.BASE}/survey/"
+            self.RESULT_BASE = f"{self.BASE}/result/"
+        self.limit = limit
+        self.compact = compact
+        self.parser = parser
+        self.strain = strain
+        self.state_path = state_path
+        # id ranges already scraped, newest first; the one reaching down to 0
+        # is the floor below which nothing is left to fetch
+        self.done = self.load_done(state_path) if state_path else []
+        self.backlog = backlog
+        self.covered: list[list[int]] = []
+        self.uncommitted: list[list[int]] = []
+        self.workers = max(1, int(workers))
+        self.max_per_second = max_per_second
+        self._bucket = TokenBucket(max_per_second) if max_per_second else None
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = backoff
+        self.failed_pages: list[int] = []
+        self.metrics = ScrapeMetrics(on_progress, progress_every)
+        if self.workers > 1:
+            self._size_pool(self.workers)
+        if cache_dir:
+            # instance attribute shadows the shared client for this scraper only
+            self._http = CachedHTTP(
+                type(self)._http, cache_dir, ttl=cache_ttl,
+                revalidate_prefixes=(self.SURVEY_BASE,),
+            )
+        if record_dir:
+            self._http = RecordingHTTP(self._http, record_dir)
+        self.journal = ScrapeJournal(checkpoint_path, checkpoint_every) if checkpoint_path else None
+        self.persisted = persisted
+
+        # run the pipelined survey -> detail workflow as part of initialization
+        self.links = []
         self.data = []
-        for item in self.links:
-            rid = item["result_id"]
-            try:
-                detail = self.get_detail_fields(self.RESULT_BASE, rid)
-            except Exception as e:
-                # preserve basic failure info and continue
-                detail = {"result_id": rid, "detail_error": str(e)}
-            # ensure the detail record is a dict; append to list
-            if isinstance(detail, dict):
-                self.data.append(detail)
-            else:
-                # if legacy function returned list, try to extract first entry
-                if isinstance(detail, list) and detail:
-                    self.data.append(detail[0])
-                else:
-                    self.data.append({"result_id": rid})
-
-        # Merge into combined list using result_id as key
-        survey_map = {r["result_id"]: r for r in self.links}
-        detail_map = {d.get("result_id"): d for d in self.data if d.get("result_id") is not None}
-
         self.combined = []
-        for rid, srec in survey_map.items():
-            drec = detail_map.get(rid, {})
-            merged = {**srec, **drec}
-            self.combined.append(merged)
+        if not eager:
+            return
+        for srec, drec in self._iter_pairs(limit):
+            self.links.append(srec)
+            self.data.append(drec)
+            self.combined.append(self._merge(srec, drec))
+
+    def iter_records(
+        self,
+        limit: int | None = None,
+        replay: bool = True,
+        start_page: int = 1,
+        end_page: int | None = None,
+    ):
+        """
+        Yield merged survey + detail records in survey order while scraping is still in progress.
+        With `replay=False`, results already in the checkpoint journal are
+        skipped instead of re-yielded (the consumer took them last run),
+        including ones whose detail fetch failed.
+        `start_page`/`end_page` restrict the walk to a page range (see shard.py).
+        """
+        if limit is None:
+            limit = self.limit
+        for srec, drec in self._iter_pairs(limit, replay, start_page, end_page):
+            yield self._merge(srec, drec)
+
+    def _merge(self, srec: dict, drec: dict):
+        """Combine a survey row with its detail record (detail fields win)."""
+        if self.compact:
+            return ApplicantRecord.from_parts(srec, drec)
+        return {**srec, **drec}
+
+    def _iter_pairs(
+        self,
+        limit: int | None = None,
+        replay: bool = True,
+        start_page: int = 1,
+        end_page: int | None = None,
+    ):
+        """
+        Yield (survey row, detail record) pairs. Each survey page's result_ids are
+        handed to the detail workers as soon as the page is parsed, so detail
+        fetching overlaps with walking the remaining survey pages. Pairs come
+        out in survey order and at most `workers * 4` are held in flight.
+        """
+        journal = self.journal
+        self.uncommitted = []
+        skip_ids = [self.persisted] if self.persisted is not None else []
+        if journal is not None and not replay:
+            skip_ids.append(journal.taken)
+        # a refresh stops at the newest saved id; a backlog run walks down to the floor
+        if self.backlog:
+            stop_at = self.floor(self.done)
+        else:
+            stop_at = self.done[0][1] if self.done else None
+        pages = self.iter_survey_pages(
+            self.SURVEY_BASE, start_page=start_page, end_page=end_page,
+            limit=limit, stop_at=stop_at, skip=self.done, skip_ids=skip_ids,
+        )
+        for srec, drec in self._iter_fetched(pages):
+            self.metrics.record_record()
+            yield srec, drec
+            # the consumer asked for the next pair, so it has handled this one
+            if journal is not None and srec["result_id"] not in journal:
+                journal.append(srec, drec)
+        if self.metrics.progress_every:
+            self.metrics.tick(force=True)
+        # every record walked has been handed to the consumer, but it may not
+        # have stored the last ones yet; commit_state() saves these ranges
+        self.uncommitted = self.merge_ranges(self.covered)
+        # the run finished, so there is nothing left to resume
+        if journal is not None:
+            journal.close(remove=True)
+            self.journal = None
+
+    def _iter_fetched(self, pages):
+        """Fetch detail records for each page of survey rows, overlapping with the page walk."""
+        if self.workers == 1:
+            for page_rows in pages:
+                for srec in page_rows:
+                    yield srec, self._detail_for(srec["result_id"])
+            return
+
+        max_pending = self.workers * 4
+        pending: deque = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for page_rows in pages:
+                for srec in page_rows:
+                    pending.append((srec, pool.submit(self._detail_for, srec["result_id"])))
+                    # keep the in-flight window bounded; waits on the oldest request
+                    while len(pending) >= max_pending:
+                        srec_done, fut = pending.popleft()
+                        yield srec_done, fut.result()
+                # hand back whatever already finished at the head without blocking
+                while pending and pending[0][1].done():
+                    srec_done, fut = pending.popleft()
+                    yield srec_done, fut.result()
+            while pending:
+                srec_done, fut = pending.popleft()
+                yield srec_done, fut.result()
 
 
 ##################################### survey list scraping ####################################
@@ -73,8 +257,44 @@ class scrape_data:
         delay: tuple[float, float] = (0.01, 0.05),
     ) -> list[dict]:
         """Return list of dicts with result_id, result_url, added_on, term from survey list pages."""
-        seen: set[str] = set()
         rows_out: list[dict] = []
+        for page_rows in self.iter_survey_pages(
+            survey_base, start_page, end_page, limit, page_param, delay
+        ):
+            rows_out.extend(page_rows)
+        return rows_out
+
+    def iter_survey_pages(
+        self,
+        survey_base: str,
+        start_page: int = 1,
+        end_page: int | None = None,
+        limit: int | None = None,
+        page_param: str = "page",
+        delay: tuple[float, float] = (0.01, 0.05),
+        stop_at: int | None = None,
+        skip: list | None = None,
+        skip_ids=(),
+    ):
+        """
+        Yield the survey rows found on each page, one list per page, as soon as the page is parsed.
+        Pages list newest results first, so with `stop_at` the walk ends at the
+        first page containing a result_id at or below it (ids at or below it
+        count as covered only if they fall in a `skip` range). Rows whose result_id
+        falls in one of the `skip` ranges ([lo, hi], inclusive) are walked past
+        without being yielded or counted against `limit`, as are result_ids
+        found in any of the `skip_ids` containers.
+        The id ranges the walk covered without a gap are left in `self.covered`
+        (a failed page starts a new range; reaching the end of the listing
+        extends the last one down to 0).
+        """
+        skip = skip or []
+        seen: set[str] = set()
+        total = 0
+        failed_in_a_row = 0
+        self.failed_pages = []
+        self.covered = []
+        segment = None
 
         page = start_page
         while True:
@@ -82,72 +302,189 @@ class scrape_data:
                 break
 
             page_url = f"{survey_base.rstrip('/')}/?{page_param}={page}"
-            r = self._http.request("GET", page_url, headers=self._HEADERS, timeout=20.0)
-            if r.status != 200:
+            try:
+                r = self._get(page_url, timeout=20.0)
+            except urllib3.exceptions.HTTPError:
+                r = None
+            if r is None or r.status != 200:
+                # remembered for the caller; the ids on it are not marked done
+                self.failed_pages.append(page)
+                self.metrics.record_error()
+                failed_in_a_row += 1
+                # ids on the failed page are unknown, so coverage restarts after it
+                segment = None
+                if end_page is None and failed_in_a_row >= 3:
+                    return
                 page += 1
                 continue
-
-            soup = BeautifulSoup(r.data, "html.parser")
-
-            # Iterate rows in the table body; this captures both main rows and the detail rows
-            rows = soup.select("tbody tr")
-
-            new_found = 0
-            for tr in rows:
-                tds = tr.find_all("td", recursive=False)
-                if len(tds) < 3:
-                    continue
-
-                a = tr.select_one('a[href*="/result/"]')
-                if not a:
-                    continue
-
-                href = a.get("href") or ""
-                m = self.RESULT_RE.search(href)
-                if not m:
-                    continue
-                rid = m.group(1)
+            failed_in_a_row = 0
+            t0 = time.perf_counter()
+            parsed = self.parse_survey_page(r.data, survey_base)
+            self.metrics.record_parse("survey", time.perf_counter() - t0)
+            self.metrics.record_page()
+
+            page_rows: list[dict] = []
+            fresh = 0
+            reached_known = False
+            for row in parsed:
+                rid = row["result_id"]
                 if rid in seen:
                     continue
                 seen.add(rid)
-                abs_url = urljoin(survey_base, href)
-
-                # Added On date 3rd column
-                added_on = None
-                added_text = tds[2].get_text(" ", strip=True)
-                mdate = self.DATE_RE.search(added_text)
-                added_on = mdate.group(0) if mdate else (added_text or None)
-
-                # Look for the detail row that contains tag term
-                term = None
-                detail_row = tr.find_next_sibling("tr", class_="tw-border-none")
-                if detail_row:
-                    mterm = detail_row.find(string=self.TERM_RE)
-                    if mterm:
-                        term = mterm.strip()
-
-                rows_out.append({
-                    "result_id": rid,
-                    "result_url": abs_url,
-                    "added_on": added_on,
-                    "term": term,
-                })
-                new_found += 1
+                fresh += 1
+                n = int(rid)
+                known = any(lo <= n <= hi for lo, hi in skip)
+                below = stop_at is not None and n <= stop_at
+                reached_known = reached_known or below
+                # below the stop but never fetched: the coverage ends above it
+                if below and not known:
+                    break
+                if segment is None:
+                    segment = [n, n]
+                    self.covered.append(segment)
+                else:
+                    segment[0], segment[1] = min(segment[0], n), max(segment[1], n)
+                if below or known or any(rid in ids for ids in skip_ids):
+                    continue
+                page_rows.append(row)
 
                 # Stop at limit
-                if limit is not None and len(rows_out) >= limit:
-                    return rows_out
+                if limit is not None and total + len(page_rows) >= limit:
+                    yield page_rows
+                    return
+
+            # Stop when a page has no new rows (useful if pages are finite)
+            if not fresh and end_page is None and not reached_known:
+                # nothing older is left, so everything below was walked too
+                if segment is not None:
+                    segment[0] = 0
+                break
 
-            # Stop when a page yields nothing (useful if pages are finite)
-            if new_found == 0 and end_page is None:
+            total += len(page_rows)
+            if page_rows:
+                yield page_rows
+            if reached_known:
                 break
 
             time.sleep(random.uniform(*delay))
             page += 1
 
+    def _soup(self, html: bytes | str, kind: str) -> BeautifulSoup:
+        """Parse a "survey" or "detail" page with the configured backend."""
+        only = self._STRAINERS[kind] if self.strain else None
+        return BeautifulSoup(html, self.parser, parse_only=only)
+
+    def parse_survey_page(self, html: bytes | str, survey_base: str | None = None) -> list[dict]:
+        """Extract result_id, result_url, added_on, term for every result row on one survey page."""
+        survey_base = survey_base or self.SURVEY_BASE
+        soup = self._soup(html, "survey")
+
+        # Iterate rows in the table body; this captures both main rows and the detail rows
+        rows = soup.select("tbody tr")
+
+        rows_out: list[dict] = []
+        for tr in rows:
+            tds = tr.find_all("td", recursive=False)
+            if len(tds) < 3:
+                continue
+
+            a = tr.select_one('a[href*="/result/"]')
+            if not a:
+                continue
+
+            href = a.get("href") or ""
+            m = self.RESULT_RE.search(href)
+            if not m:
+                continue
+            rid = m.group(1)
+            abs_url = urljoin(survey_base, href)
+
+            # Added On date 3rd column
+            added_on = None
+            added_text = tds[2].get_text(" ", strip=True)
+            mdate = self.DATE_RE.search(added_text)
+            added_on = mdate.group(0) if mdate else (added_text or None)
+
+            # Look for the detail row that contains tag term
+            term = None
+            detail_row = tr.find_next_sibling("tr", class_="tw-border-none")
+            if detail_row:
+                mterm = detail_row.find(string=self.TERM_RE)
+                if mterm:
+                    term = mterm.strip()
+
+            rows_out.append({
+                "result_id": rid,
+                "result_url": abs_url,
+                "added_on": added_on,
+                "term": term,
+            })
         return rows_out
 
 
+##################################### incremental state ####################################
+
+
+    @staticmethod
+    def merge_ranges(ranges) -> list[list[int]]:
+        """Union overlapping [lo, hi] id ranges, highest first."""
+        merged: list[list[int]] = []
+        for lo, hi in sorted(ranges, key=lambda r: r[1], reverse=True):
+            if merged and hi >= merged[-1][0]:
+                merged[-1][0] = min(merged[-1][0], lo)
+            else:
+                merged.append([lo, hi])
+        return merged
+
+    @staticmethod
+    def floor(done) -> int | None:
+        """Highest id of the range reaching down to 0 (everything at or below it is scraped), or None."""
+        return next((hi for lo, hi in done if lo == 0), None)
+
+    def commit_state(self) -> None:
+        """
+        Record the id ranges walked by the last finished iter_records() as done
+        (saved to `state_path`). Call it only after every record has been
+        stored, so a consumer that fails or is cancelled while writing the last
+        records leaves them to be fetched again next run.
+        """
+        if not self.uncommitted:
+            return
+        self.done = self.merge_ranges(self.done + self.uncommitted)
+        self.uncommitted = []
+        if self.state_path:
+            self.save_done(self.state_path, self.done)
+
+    @staticmethod
+    def load_done(path: str) -> list[list[int]]:
+        """Return the scraped result_id ranges recorded in the state file at `path`."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return []
+        if "done" in state:
+            return scrape_data.merge_ranges(state["done"])
+        # state files from before resume points only held the mark of a complete walk
+        value = state.get("high_water")
+        return [[0, int(value)]] if value is not None else []
+
+    @staticmethod
+    def load_high_water(path: str) -> int | None:
+        """Return the highest result_id recorded in the state file at `path`, or None."""
+        done = scrape_data.load_done(path)
+        return done[0][1] if done else None
+
+    @staticmethod
+    def save_done(path: str, done) -> None:
+        """Atomically record the scraped result_id ranges (and the high-water mark)."""
+        done = scrape_data.merge_ranges(done)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"high_water": done[0][1] if done else None, "done": done}, f)
+        os.replace(tmp, path)
+
+
 #################################### detail scraping ####################################
 
 
@@ -156,11 +493,18 @@ class scrape_data:
         Fetch detail page for `rid` and return a single dict of fields (result_id included).
         """
         url = f"{result_base.rstrip('/')}/{rid}"
-        r = self._http.request("GET", url, headers=self._HEADERS, timeout=30.0, preload_content=True)
+        r = self._get(url, timeout=30.0)
         if r.status != 200:
             raise Exception(f"Request failed with status {r.status} for {url}")
 
-        soup = BeautifulSoup(r.data, "html.parser")
+        t0 = time.perf_counter()
+        result = self.parse_detail_page(r.data, rid)
+        self.metrics.record_parse("detail", time.perf_counter() - t0)
+        return result
+
+    def parse_detail_page(self, html: bytes | str, rid) -> dict:
+        """Extract the dt/dd fields and GRE/score list from one detail page."""
+        soup = self._soup(html, "detail")
 
         result = {"result_id": rid}
 
@@ -187,6 +531,87 @@ class scrape_data:
         return result
 
 
+#################################### concurrent detail fetching ####################################
+
+
+    @classmethod
+    def _size_pool(cls, size: int) -> None:
+        """Grow the shared PoolManager so `size` threads can each hold a connection."""
+        kw = cls._http.connection_pool_kw
+        if kw.get("maxsize", 1) < size:
+            kw["maxsize"] = size
+            # drop existing pools so they are rebuilt with the new size
+            cls._http.clear()
+
+    def _throttle(self) -> None:
+        """Block until the token bucket allows another request (no-op without `max_per_second`)."""
+        if self._bucket is not None:
+            self._bucket.acquire()
+
+    def _get(self, url: str, timeout: float):
+        """
+        GET `url` through the rate limiter, retrying connection errors and
+        RETRY_STATUSES with exponential backoff + jitter (or the server's
+        Retry-After). Returns the last response; raises if every attempt
+        failed at the connection level.
+        """
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.metrics.record_retry()
+            self._throttle()
+            t0 = time.perf_counter()
+            try:
+                r = self._http.request("GET", url, headers=self._HEADERS, timeout=timeout, preload_content=True)
+            except urllib3.exceptions.HTTPError:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff_delay(attempt, self.backoff))
+                continue
+            self.metrics.record_fetch(time.perf_counter() - t0, len(r.data or b""))
+
+            if r.status not in self.RETRY_STATUSES:
+                if self._bucket is not None:
+                    self._bucket.reward()
+                return r
+            if r.status in self.THROTTLE_STATUSES and self._bucket is not None:
+                self._bucket.penalize()
+            if attempt == self.max_retries:
+                return r
+            wait = retry_after_seconds(r.headers)
+            time.sleep(wait if wait is not None else backoff_delay(attempt, self.backoff))
+        return r
+
+    def _fetch_detail(self, rid) -> dict:
+        """Fetch one detail record, recording failures as `detail_error` instead of raising."""
+        try:
+            detail = self.get_detail_fields(self.RESULT_BASE, rid)
+        except Exception as e:
+            # preserve basic failure info and continue
+            self.metrics.record_error()
+            return {"result_id": rid, "detail_error": str(e)}
+        # ensure the detail record is a dict
+        if isinstance(detail, dict):
+            return detail
+        # if legacy function returned list, try to extract first entry
+        if isinstance(detail, list) and detail:
+            return detail[0]
+        return {"result_id": rid}
+
+    def _detail_for(self, rid) -> dict:
+        """Return the journaled detail record for `rid` if a previous run finished it, else fetch it."""
+        if self.journal is not None and rid in self.journal:
+            return self.journal.get(rid)[1]
+        return self._fetch_detail(rid)
+
+    def fetch_details(self, rids: list) -> list[dict]:
+        """Fetch detail records for `rids`, `self.workers` at a time, in the same order as `rids`."""
+        if self.workers == 1:
+            return [self._fetch_detail(rid) for rid in rids]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # map() yields results in submission order, so output stays deterministic
+            return list(pool.map(self._fetch_detail, rids))
+
+
 ############################################### Main script ###############################################
 
 
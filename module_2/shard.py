@@ -0,0 +1,120 @@
+"""Split a survey page range across worker processes and merge their output.
+
+Each worker process walks its own contiguous slice of survey pages with its
+own PoolManager and writes raw merged records to a shard JSONL file. The
+coordinator then concatenates the shards in page order, drops result_ids
+that appear in more than one shard (listings shift while a scrape runs, so
+neighbouring shards can overlap at their edges), cleans each record and
+writes one ordered JSONL file.
+
+    python shard.py --start 1 --end 1500 --processes 4 --out applicant_data.jsonl
+"""
+
+import os
+import json
+import argparse
+import urllib3
+from concurrent.futures import ProcessPoolExecutor
+
+from scrape import scrape_data
+from clean import clean_data
+from app import save_jsonl
+
+
+def partition(start_page: int, end_page: int, shards: int) -> list[tuple[int, int]]:
+    """Split [start_page, end_page] into at most `shards` contiguous, nearly equal ranges."""
+    total = end_page - start_page + 1
+    shards = max(1, min(shards, total))
+    size, extra = divmod(total, shards)
+    ranges = []
+    page = start_page
+    for i in range(shards):
+        n = size + (1 if i < extra else 0)
+        ranges.append((page, page + n - 1))
+        page += n
+    return ranges
+
+
+def _init_worker() -> None:
+    # a forked child must not share the parent's sockets
+    scrape_data._http = urllib3.PoolManager()
+
+
+def _scrape_shard(start: int, end: int, out_path: str, options: dict) -> tuple[str, int]:
+    scraper = scrape_data(eager=False, **options)
+    count = 0
+    with open(out_path, "w", encoding="utf-8") as f:
+        for record in scraper.iter_records(start_page=start, end_page=end):
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return out_path, count
+
+
+def _iter_shard_records(paths: list[str]):
+    """Yield records from the shard files in order, skipping result_ids already seen."""
+    seen: set[str] = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                rid = record.get("result_id")
+                if rid in seen:
+                    continue
+                seen.add(rid)
+                yield record
+
+
+def scrape_shards(
+    start_page: int,
+    end_page: int,
+    processes: int,
+    out_path: str,
+    workers: int = 4,
+    max_per_second: float | None = None,
+    keep_shards: bool = False,
+    **options,
+) -> int:
+    """
+    Scrape survey pages start_page..end_page with `processes` worker processes and
+    write the deduplicated, cleaned records to `out_path`. `max_per_second` is the
+    total rate across all processes. Returns the number of records written.
+    """
+    ranges = partition(start_page, end_page, processes)
+    if max_per_second:
+        options["max_per_second"] = max_per_second / len(ranges)
+    options["workers"] = workers
+
+    shard_paths = [f"{out_path}.shard{i}" for i in range(len(ranges))]
+    with ProcessPoolExecutor(max_workers=len(ranges), initializer=_init_worker) as pool:
+        futures = [
+            pool.submit(_scrape_shard, start, end, path, options)
+            for (start, end), path in zip(ranges, shard_paths)
+        ]
+        for fut in futures:
+            fut.result()
+
+    written = save_jsonl(clean_data.stream(_iter_shard_records(shard_paths)), out_path)
+    if not keep_shards:
+        for path in shard_paths:
+            os.remove(path)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape GradCafe survey pages across several processes.")
+    parser.add_argument("--start", type=int, default=1, help="First survey page.")
+    parser.add_argument("--end", type=int, required=True, help="Last survey page.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2, help="Worker processes.")
+    parser.add_argument("--workers", type=int, default=4, help="Detail fetch threads per process.")
+    parser.add_argument("--max-per-second", type=float, default=None, help="Total request rate across processes.")
+    parser.add_argument("--out", default="applicant_data.jsonl", help="Merged JSON Lines output.")
+    parser.add_argument("--keep-shards", action="store_true", help="Keep the per-shard files.")
+    args = parser.parse_args()
+
+    n = scrape_shards(
+        args.start, args.end, args.processes, args.out,
+        workers=args.workers, max_per_second=args.max_per_second,
+        keep_shards=args.keep_shards, parser="lxml", strain=True,
+    )
+    print(f"wrote {n} records to {args.out}")
@@ -0,0 +1,34 @@
+# tests/conftest.py
+import os
+import pytest
+
+ROWS_PER_PAGE = 10
+
+
+def _survey_page(ids):
+    rows = "".join(
+        f'<tr><td>Uni {rid}</td><td>Program</td><td>January 5, 2025</td>'
+        f'<td><a href="/result/{rid}">open</a></td></tr>'
+        for rid in ids
+    )
+    return f"<html><body><table><tbody>{rows}</tbody></table></body></html>"
+
+
+@pytest.fixture
+def make_archive(tmp_path):
+    """Write a replay archive listing `ids` (newest first) with a detail page per id; returns its path."""
+    def make(ids, name="archive", missing=()):
+        root = tmp_path / name
+        os.makedirs(root / "survey", exist_ok=True)
+        os.makedirs(root / "result", exist_ok=True)
+        ids = sorted(ids, reverse=True)
+        for n, start in enumerate(range(0, len(ids), ROWS_PER_PAGE), 1):
+            (root / "survey" / f"page-{n}.html").write_text(_survey_page(ids[start:start + ROWS_PER_PAGE]))
+        for rid in ids:
+            if rid not in missing:
+                (root / "result" / f"{rid}.html").write_text(
+                    f"<html><body><dl><div><dt>Program</dt><dd>CS {rid}</dd></div></dl></body></html>"
+                )
+        return str(root)
+
+    return make
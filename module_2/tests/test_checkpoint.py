@@ -0,0 +1,74 @@
+"""Crash recovery against a local replay of the listing (no network needed).
+
+a. Output checkpoint
+i. A run that crashed part-way resumes without writing any result twice
+ii. A torn final output line is cut off before the resumed run appends
+b. Journal
+i. With replay=False a result whose detail fetch failed is not yielded again
+ii. With replay=True that result is retried
+
+"""
+
+# tests/test_checkpoint.py
+import json
+from itertools import islice
+from app import save_jsonl
+from checkpoint import OutputCheckpoint
+from replay import ReplayServer
+from scrape import scrape_data
+
+
+def _scraper(server, **kw):
+    return scrape_data(eager=False, base_url=server.url, **kw)
+
+
+def _ids(out):
+    with open(out, encoding="utf-8") as f:
+        return [json.loads(line)["result_id"] for line in f]
+
+
+# a.i / a.ii — resume from the output file
+def test_crashed_run_resumes_without_duplicates(tmp_path, make_archive):
+    cp, out = str(tmp_path / "cp.json"), str(tmp_path / "out.jsonl")
+    with open(out, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"result_id": "1"}) + "\n")   # an earlier run's output
+
+    with ReplayServer(make_archive(range(1001, 1051))) as server:
+        checkpoint = OutputCheckpoint(cp, out)
+        records = _scraper(server, persisted=checkpoint, workers=4).iter_records()
+        assert save_jsonl(islice(records, 20), out, append=True) == 20
+        # the crash: no checkpoint.close(), and half a line left behind
+        with open(out, "a", encoding="utf-8") as f:
+            f.write('{"result_id": "10')
+
+        checkpoint = OutputCheckpoint(cp, out)
+        assert len(checkpoint) == 20
+        records = _scraper(server, persisted=checkpoint, workers=4).iter_records()
+        assert save_jsonl(records, out, append=True) == 30
+        checkpoint.close()
+
+    ids = _ids(out)
+    assert ids[0] == "1"
+    assert sorted(ids[1:]) == [str(i) for i in range(1001, 1051)]
+    assert not (tmp_path / "cp.json").exists()
+
+
+# b.i / b.ii — failed details and the journal
+def test_journal_does_not_reyield_failed_results(tmp_path, make_archive):
+    journal = str(tmp_path / "journal.jsonl")
+    with ReplayServer(make_archive(range(1001, 1021), missing={1019})) as server:
+        records = _scraper(server, checkpoint_path=journal, checkpoint_every=1, max_retries=0).iter_records()
+        first = [next(records) for _ in range(4)]
+        records.close()
+        assert "detail_error" in first[1] and first[1]["result_id"] == "1019"
+
+        # the three results handed over before the last one are journaled, failed one included;
+        # replay=True retries the failed detail
+        records = _scraper(server, checkpoint_path=journal, max_retries=0).iter_records(replay=True)
+        retried = list(islice(records, 2))
+        records.close()
+        assert [r["result_id"] for r in retried] == ["1020", "1019"]
+        assert "detail_error" in retried[1]
+
+        again = list(_scraper(server, checkpoint_path=journal).iter_records(replay=False))
+    assert [r["result_id"] for r in again] == [str(i) for i in range(1017, 1000, -1)]
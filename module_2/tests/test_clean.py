@@ -0,0 +1,46 @@
+"""Batch cleaning (no network needed).
+
+a. Typed cleaning
+i. Scores become floats under the loader's column names (0 -> None) and dates become ISO
+ii. Dicts and compact records clean to the same values (compact output leaves out missing ones)
+iii. Batches of one give the same records as large batches
+
+"""
+
+# tests/test_clean.py
+from clean import clean_data
+from records import ApplicantRecord
+
+
+def _parts(i):
+    survey = {"result_id": str(i), "result_url": f"https://x/result/{i}",
+              "added_on": "September  06, 2025", "term": "Fall 2025"}
+    detail = {"result_id": str(i), "Institution": " Johns  Hopkins ", "Program": "Computer Science",
+              "Decision": "Accepted", "Undergrad GPA": "3.90", "GRE General": "0",
+              "GRE Verbal": "160", "Notes": f"note  {i}"}
+    return survey, detail
+
+
+def _dicts(n):
+    return [{**s, **d} for s, d in map(_parts, range(n))]
+
+
+# a.i — typed values
+def test_clean_batch_types_scores_and_dates():
+    rec = clean_data.clean_batch(_dicts(1))[0]
+    assert rec["date_added"] == "2025-09-06"
+    assert rec["university"] == "Johns Hopkins" and rec["status"] == "Accepted"
+    assert rec["gpa"] == 3.9 and rec["gre"] is None and rec["gre_v"] == 160.0 and rec["gre_aw"] is None
+    assert rec["Notes"] == "note 0"
+
+
+# a.ii — dicts and ApplicantRecord agree
+def test_compact_records_match_dicts():
+    compact = clean_data.clean_batch([ApplicantRecord.from_parts(*_parts(i)) for i in range(5)])
+    dicts = clean_data.clean_batch(_dicts(5))
+    assert [r.to_dict() for r in compact] == [{k: v for k, v in d.items() if v is not None} for d in dicts]
+
+
+# a.iii — batch size does not change the output
+def test_batch_size_does_not_change_output():
+    assert list(clean_data.stream(_dicts(7), batch_size=1)) == list(clean_data.stream(_dicts(7), batch_size=3))
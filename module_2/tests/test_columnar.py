@@ -0,0 +1,53 @@
+"""Columnar export (no network needed).
+
+a. Round trip
+i. Rows written in several row groups read back unchanged, including fields that first appear in a later group
+ii. Columns are dictionary / float / text encoded per group
+b. Memory
+i. Writing holds at most one row group of records
+
+"""
+
+# tests/test_columnar.py
+import tracemalloc
+from columnar import ColumnarReader, write_columnar
+
+
+def _records(n, start=0):
+    for i in range(start, start + n):
+        rec = {"result_id": str(i), "status": ["Accepted", "Rejected"][i % 2],
+               "gpa": 3.5 if i % 3 else None, "Notes": f"note {i}"}
+        if i >= 7:
+            rec["Degree"] = "PhD"
+        yield rec
+
+
+# a.i / a.ii — round trip across row groups
+def test_round_trip_across_groups(tmp_path):
+    path = str(tmp_path / "out.gcol")
+    assert write_columnar(_records(10), path, group_rows=4) == 10
+    with ColumnarReader(path) as reader:
+        assert reader.rows == 10
+        assert list(reader.iter_rows()) == [{k: v for k, v in r.items() if v is not None} for r in _records(10)]
+        assert reader.column("Degree") == [None] * 7 + ["PhD"] * 3
+        kinds = {c["name"]: c["kind"] for c in reader.stats()}
+    assert kinds["status"] == "dict" and kinds["gpa"] == "float" and kinds["Notes"] == "text"
+
+
+def test_empty_input(tmp_path):
+    path = str(tmp_path / "empty.gcol")
+    assert write_columnar(iter(()), path) == 0
+    with ColumnarReader(path) as reader:
+        assert reader.rows == 0 and reader.columns == []
+
+
+# b.i — bounded memory
+def test_writer_memory_is_bounded_by_group(tmp_path):
+    def peak(n):
+        tracemalloc.start()
+        write_columnar(_records(n), str(tmp_path / f"{n}.gcol"), group_rows=1000)
+        _, top = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return top
+
+    assert peak(20000) < 2 * peak(2000)
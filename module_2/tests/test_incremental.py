@@ -0,0 +1,117 @@
+"""Incremental scraping against a local replay of the listing (no network needed).
+
+a. Refresh and backlog runs
+i. A refresh fetches only results newer than the newest saved id and stops on the first page reaching it
+ii. Backlog runs resume below a run cut short by `limit`; repeated runs append every result exactly once
+iii. Backlog runs fill the gaps a capped refresh leaves between saved ranges
+b. State files
+i. State files that only hold a high-water mark are read as one complete range
+ii. Nothing is saved until the consumer calls commit_state() after storing every record
+
+"""
+
+# tests/test_incremental.py
+import json
+import pytest
+from app import save_jsonl
+from replay import ReplayServer
+from scrape import scrape_data
+
+
+def _run(server, state, out, limit=None, backlog=False):
+    scraper = scrape_data(limit=limit, eager=False, base_url=server.url, state_path=str(state), backlog=backlog)
+    written = save_jsonl(scraper.iter_records(replay=False), str(out), append=True)
+    scraper.commit_state()
+    return written, scraper.metrics.pages
+
+
+def _ids(out):
+    with open(out, encoding="utf-8") as f:
+        return [json.loads(line)["result_id"] for line in f]
+
+
+# a.i — the daily refresh doesn't re-walk history
+def test_refresh_stops_at_newest_known(tmp_path, make_archive):
+    state, out = tmp_path / "state.json", tmp_path / "out.jsonl"
+    with ReplayServer(make_archive(range(1001, 1031))) as server:
+        assert _run(server, state, out) == (30, 4)
+    assert scrape_data.load_done(str(state)) == [[0, 1030]]
+
+    with ReplayServer(make_archive(range(1001, 1036), "b")) as server:
+        assert _run(server, state, out) == (5, 1)
+        assert _run(server, state, out) == (0, 1)
+    assert _ids(out)[30:] == [str(i) for i in range(1035, 1030, -1)]
+    assert scrape_data.load_done(str(state)) == [[0, 1035]]
+
+
+# a.ii — limit-truncated runs resume instead of re-fetching the newest results
+def test_backlog_resumes_truncated_runs_without_duplicates(tmp_path, make_archive):
+    state, out = tmp_path / "state.json", tmp_path / "out.jsonl"
+    with ReplayServer(make_archive(range(1001, 1051))) as server:
+        assert _run(server, state, out, limit=25)[0] == 25
+        assert state.exists()
+        assert _run(server, state, out, limit=25)[0] == 0
+        assert _run(server, state, out, limit=25, backlog=True)[0] == 25
+        assert _run(server, state, out, limit=25, backlog=True)[0] == 0
+
+    ids = _ids(out)
+    assert len(ids) == 50 and len(set(ids)) == 50
+    assert scrape_data.load_done(str(state)) == [[0, 1050]]
+
+
+# a.iii — a capped refresh leaves a gap that the backlog fills
+def test_backlog_fills_gaps_between_ranges(tmp_path, make_archive):
+    state, out = tmp_path / "state.json", tmp_path / "out.jsonl"
+    with ReplayServer(make_archive(range(1001, 1031))) as server:
+        _run(server, state, out, limit=10)
+    assert scrape_data.load_done(str(state)) == [[1021, 1030]]
+
+    # five newer results arrive, more than the next refresh's limit
+    with ReplayServer(make_archive(range(1001, 1036), "b")) as server:
+        assert _run(server, state, out, limit=3)[0] == 3
+        assert scrape_data.load_done(str(state)) == [[1033, 1035], [1021, 1030]]
+        _run(server, state, out, backlog=True)
+
+    ids = _ids(out)
+    assert ids[10:15] == ["1035", "1034", "1033", "1032", "1031"]
+    assert sorted(ids) == sorted(str(i) for i in range(1001, 1036))
+    assert scrape_data.load_high_water(str(state)) == 1035
+    assert scrape_data.load_done(str(state)) == [[0, 1035]]
+
+
+# b.i — old state files
+def test_legacy_high_water_state(tmp_path, make_archive):
+    state = tmp_path / "state.json"
+    state.write_text(json.dumps({"high_water": 1040}))
+    assert scrape_data.load_done(str(state)) == [[0, 1040]]
+    with ReplayServer(make_archive(range(1001, 1051))) as server:
+        scraper = scrape_data(eager=False, base_url=server.url, state_path=str(state))
+        assert [r["result_id"] for r in scraper.iter_records()] == [str(i) for i in range(1050, 1040, -1)]
+        assert scraper.metrics.pages == 2
+        scraper.commit_state()
+    assert scrape_data.load_done(str(state)) == [[0, 1050]]
+
+
+# b.ii — the consumer confirms before the state moves
+def test_state_waits_for_commit(tmp_path, make_archive):
+    state = tmp_path / "state.json"
+    with ReplayServer(make_archive(range(1001, 1031))) as server:
+        scraper = scrape_data(eager=False, base_url=server.url, state_path=str(state))
+        records = list(scraper.iter_records())
+    assert len(records) == 30 and not state.exists()
+
+    # a consumer that failed storing the last records never commits: they are fetched again
+    with ReplayServer(make_archive(range(1001, 1031))) as server:
+        scraper = scrape_data(eager=False, base_url=server.url, state_path=str(state))
+        assert len(list(scraper.iter_records())) == 30
+        scraper.commit_state()
+    assert scrape_data.load_done(str(state)) == [[0, 1030]]
+
+
+@pytest.mark.parametrize("ranges, merged", [
+    ([[5, 9], [1, 3]], [[5, 9], [1, 3]]),
+    ([[1, 5], [4, 9]], [[1, 9]]),
+    ([[0, 3], [3, 7], [10, 12]], [[10, 12], [0, 7]]),
+])
+def test_merge_ranges(ranges, merged):
+    assert scrape_data.merge_ranges(ranges) == merged
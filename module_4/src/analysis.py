@@ -0,0 +1,74 @@
+# analysis.py
+# Every dashboard / query_data answer computed in one query with conditional
+# aggregates, so adding a metric never adds a round trip. The same metric list
+# runs either over the small applicants_summary table (see summary.py) or as a
+# full scan of 'applicants'.
+
+FALL_2025 = "term = 'Fall 2025'"
+FALL_2025_ACCEPTED = "term = 'Fall 2025' AND status = 'Accepted'"
+
+# (name, "count" or "avg", averaged column, filter); add a metric by adding a line here.
+# Filters may only use the summary dimensions (summary.DIMENSIONS).
+METRICS = [
+    ("total", "count", None, None),
+    ("q1", "count", None, FALL_2025),
+    ("intl", "count", None, "us_or_international = 'International'"),
+    ("avg_gpa", "avg", "gpa", None),
+    ("avg_gre", "avg", "gre", None),
+    ("avg_gre_v", "avg", "gre_v", None),
+    ("avg_gre_aw", "avg", "gre_aw", None),
+    ("avg_gpa_us_fall2025", "avg", "gpa",
+     f"us_or_international IN ('US', 'American') AND {FALL_2025}"),
+    ("fall_accept", "count", None, FALL_2025_ACCEPTED),
+    ("avg_gpa_fall_accepted", "avg", "gpa", FALL_2025_ACCEPTED),
+    ("jhu_ms_cs", "count", None, """llm_generated_university IN ('johns hopkins', 'jhu')
+                  AND llm_generated_program = 'computer science' AND degree = 'Masters'"""),
+    ("gtown_phd_cs_2025_accept", "count", None, f"""{FALL_2025_ACCEPTED}
+                  AND llm_generated_university = 'georgetown'
+                  AND llm_generated_program = 'computer science' AND degree = 'PhD'"""),
+    ("berkeley", "count", None, f"""{FALL_2025_ACCEPTED}
+                  AND llm_generated_university = 'University of California, Berkeley'"""),
+    ("rejected", "count", None, f"{FALL_2025} AND status = 'Rejected'"),
+]
+
+COLUMNS = [name for name, *_ in METRICS]
+
+
+def _expr(kind, column, where, summary):
+    filt = f" FILTER (WHERE {where})" if where else ""
+    if not summary:
+        return f"COUNT(*){filt}" if kind == "count" else f"AVG({column}){filt}"
+    if kind == "count":
+        return f"COALESCE(SUM(n){filt}, 0)::bigint"
+    return f"(SUM({column}_sum){filt} / NULLIF(SUM({column}_n){filt}, 0))::float8"
+
+
+def _select(table, summary):
+    return "SELECT\n    " + ",\n    ".join(
+        f"{_expr(kind, column, where, summary)} AS {name}" for name, kind, column, where in METRICS
+    ) + f"\nFROM {table}"
+
+
+ANALYSIS_SQL = _select("applicants", summary=False)
+SUMMARY_SQL = _select("applicants_summary", summary=True)
+# the summary table is created by load_data.create_schema, i.e. on the first load or pull
+SUMMARY_EXISTS_SQL = "SELECT to_regclass('applicants_summary') IS NOT NULL"
+
+
+def pct(part, whole):
+    return round((part / whole) * 100, 2) if whole else 0.0
+
+
+def compute(cur, summary=True):
+    """
+    Run the analysis query (from the summary table by default) and return the values the dashboard renders.
+    A database no load or pull has touched yet has no summary table; it is scanned instead.
+    """
+    if summary:
+        cur.execute(SUMMARY_EXISTS_SQL)
+        summary = bool(cur.fetchone()[0])
+    cur.execute(SUMMARY_SQL if summary else ANALYSIS_SQL)
+    a = dict(zip(COLUMNS, cur.fetchone()))
+    a["pct_intl"] = pct(a["intl"], a["total"])
+    a["pct_fall_accept"] = pct(a["fall_accept"], a["q1"])
+    return a
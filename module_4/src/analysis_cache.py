@@ -0,0 +1,160 @@
+# analysis_cache.py
+# Cache for the dashboard's analysis results between data loads.
+
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS analysis_cache (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        payload TEXT,
+        computed_at REAL,
+        generation INTEGER NOT NULL DEFAULT 0
+    );
+    INSERT OR IGNORE INTO analysis_cache (id, generation) VALUES (1, 0);
+"""
+
+
+def _open(path):
+    db = sqlite3.connect(path, timeout=5)
+    db.executescript(SCHEMA)
+    return db
+
+
+def invalidate_shared(path):
+    """Mark the shared cache at `path` stale, e.g. after load_data finishes a load."""
+    db = _open(path)
+    try:
+        with db:
+            db.execute("UPDATE analysis_cache SET payload = NULL, generation = generation + 1 WHERE id = 1")
+    finally:
+        db.close()
+
+
+class AnalysisCache:
+    """
+    Serve `compute()` results from memory for up to `ttl` seconds.
+
+    With `path`, results are also shared through a small SQLite file so every
+    worker process reuses one computation. Invalidations and newly stored
+    results bump a generation counter there; workers compare against it at
+    most every `recheck` seconds (then reload the shared result), so cache
+    hits in between never touch the disk. Only one thread
+    per process recomputes at a time; the others wait for its result. A
+    result whose computation overlapped an invalidate() is returned to its
+    caller but not cached.
+    """
+
+    def __init__(self, compute, ttl=300.0, path=None, recheck=2.0):
+        self.compute = compute
+        self.ttl = ttl
+        self.path = path
+        self.recheck = recheck
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._value = None
+        self._expires = 0.0
+        self._generation = None
+        self._checked = 0.0
+        # bumped by invalidate(); a compute that overlapped one isn't kept
+        self._invalidations = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, now):
+        with self._lock:
+            if self._value is None or now >= self._expires:
+                return None
+            if self.path and now - self._checked >= self.recheck:
+                self._checked = now
+                if self._shared_generation() != self._generation:
+                    return None
+            return self._value
+
+    def _shared_generation(self):
+        db = _open(self.path)
+        try:
+            return db.execute("SELECT generation FROM analysis_cache WHERE id = 1").fetchone()[0]
+        finally:
+            db.close()
+
+    def _remember(self, value, generation, expires, invalidations=None):
+        with self._lock:
+            if invalidations is not None and invalidations != self._invalidations:
+                return
+            self._value = value
+            self._generation = generation
+            self._expires = expires
+            self._checked = time.monotonic()
+
+    def get(self):
+        value = self._fresh(time.monotonic())
+        if value is not None:
+            self.hits += 1
+            return value
+        with self._refresh_lock:
+            # another thread may have refreshed while we waited
+            value = self._fresh(time.monotonic())
+            if value is not None:
+                self.hits += 1
+                return value
+            self.misses += 1
+            if self.path:
+                value = self._load_shared()
+                if value is not None:
+                    return value
+            return self._refresh()
+
+    def _load_shared(self):
+        db = _open(self.path)
+        try:
+            payload, computed_at, generation = db.execute(
+                "SELECT payload, computed_at, generation FROM analysis_cache WHERE id = 1"
+            ).fetchone()
+        finally:
+            db.close()
+        age = time.time() - (computed_at or 0)
+        if payload is None or age >= self.ttl:
+            return None
+        value = json.loads(payload)
+        self._remember(value, generation, time.monotonic() + self.ttl - age)
+        return value
+
+    def _refresh(self):
+        generation = self._shared_generation() if self.path else None
+        with self._lock:
+            invalidations = self._invalidations
+        value = self.compute()
+        if self.path:
+            db = _open(self.path)
+            try:
+                with db:
+                    # skip the write if a load invalidated the cache while we computed;
+                    # a stored result is a new generation, so other workers pick it up
+                    stored = db.execute(
+                        "UPDATE analysis_cache SET payload = ?, computed_at = ?, generation = generation + 1 "
+                        "WHERE id = 1 AND generation = ?",
+                        (json.dumps(value, default=float), time.time(), generation),
+                    ).rowcount
+            finally:
+                db.close()
+            if stored:
+                generation += 1
+        self._remember(value, generation, time.monotonic() + self.ttl, invalidations)
+        return value
+
+    def refresh(self):
+        """Recompute now (the Update Analysis button) and share the result."""
+        with self._refresh_lock:
+            self.misses += 1
+            return self._refresh()
+
+    def invalidate(self):
+        """Drop the cached results here and, with a shared store, in every worker."""
+        with self._lock:
+            self._value = None
+            self._invalidations += 1
+        if self.path:
+            invalidate_shared(self.path)
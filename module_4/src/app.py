@@ -1,19 +1,19 @@
 
-from flask import Flask, render_template, redirect, url_for, flash
-import threading
+from flask import Flask, render_template, redirect, url_for, flash, jsonify, request
 import os
 import psycopg2
 
+import analysis
+import jobs
+from analysis_cache import AnalysisCache
+from db_pool import ConnectionPool
+from jobs import JobRunner
+
 app = Flask(__name__)
 
 app.secret_key = "dev"   # any non-empty string is fine for class use
 
-def one(cur, sql):
-    cur.execute(sql)
-    row = cur.fetchone()
-    return row[0] if row else None
-
-def get_conn():
+def connect():
     host = os.environ.get("PGHOST", "localhost")
     port = int(os.environ.get("PGPORT", "5432"))
     dbname = os.environ.get("PGDATABASE", "applicants")
@@ -21,116 +21,95 @@ def get_conn():
     password = os.environ.get("PGPASSWORD", "Pr0m3th3u$")
     return psycopg2.connect(host=host, port=port, dbname=dbname, user=user, password=password)
 
-@app.route("/")
-def index():
+# Shared by every route; connections are opened on first use
+pool = ConnectionPool(
+    connect,
+    maxconn=int(os.environ.get("PGPOOL_MAX", "10")),
+    timeout=float(os.environ.get("PGPOOL_TIMEOUT", "5")),
+    max_age=float(os.environ.get("PGPOOL_MAX_AGE", "1800")),
+)
+
+def get_conn():
+    """Borrow a pooled connection: `with get_conn() as conn:` commits and returns it."""
+    return pool.connection()
+
+def compute_analysis():
     with get_conn() as conn:
         with conn.cursor() as cur:
-            # The following SQL mirrors query_data.py exactly.
-            q1 = one(cur, """
-                SELECT COUNT(*) FROM applicants
-                WHERE term = 'Fall 2025'
-            """)
-            total = one(cur, "SELECT COUNT(*) FROM applicants")
-            intl = one(cur, """
-                SELECT COUNT(*) FROM applicants
-                WHERE us_or_international = 'International'
-            """)
-            pct_intl = round((intl / total) * 100, 2) if total else 0.0
-
-            avg_gpa = one(cur, "SELECT AVG(gpa) FROM applicants WHERE gpa IS NOT NULL")
-            avg_gre = one(cur, "SELECT AVG(gre) FROM applicants WHERE gre IS NOT NULL")
-            avg_gre_v = one(cur, "SELECT AVG(gre_v) FROM applicants WHERE gre_v IS NOT NULL")
-            avg_gre_aw = one(cur, "SELECT AVG(gre_aw) FROM applicants WHERE gre_aw IS NOT NULL")
-
-            avg_gpa_us_fall2025 = one(cur, """
-                SELECT AVG(gpa) FROM applicants
-                WHERE (us_or_international = 'US' OR us_or_international = 'American')
-                  AND term = 'Fall 2025' AND gpa IS NOT NULL
-            """)
-
-            fall_total = one(cur, "SELECT COUNT(*) FROM applicants WHERE term = 'Fall 2025'")
-            fall_accept = one(cur, """
-                SELECT COUNT(*) FROM applicants
-                WHERE term = 'Fall 2025' AND status = 'Accepted'
-            """)
-            pct_fall_accept = round((fall_accept / fall_total) * 100, 2) if fall_total else 0.0
-
-            avg_gpa_fall_accepted = one(cur, """
-                SELECT AVG(gpa) FROM applicants
-                WHERE term = 'Fall 2025' AND status = 'Accepted' AND gpa IS NOT NULL
-            """)
-
-            jhu_ms_cs = one(cur, """
-                SELECT COUNT(*) FROM applicants
-                WHERE (llm_generated_university = 'johns hopkins' OR llm_generated_university = 'jhu')
-                  AND llm_generated_program = 'computer science'
-                  AND degree = 'Masters'
-            """)
-
-            gtown_phd_cs_2025_accept = one(cur, """
-                SELECT COUNT(*) FROM applicants
-                WHERE term = '2025'
-                  AND status = 'Accepted'
-                  AND llm_generated_university = 'georgetown'
-                  AND llm_generated_program = 'computer science'
-                  AND degree = 'PhD'
-            """)
-            
-            berkeley = one(cur, """
-                SELECT COUNT(*) FROM applicants
-                WHERE term = 'Fall 2025'
-                    AND status = 'Accepted'
-                    AND llm_generated_university = 'University of California, Berkeley'
-            """)
-
-            rejected = one(cur, """
-                SELECT COUNT(*) FROM applicants
-                WHERE term = 'Fall 2025'
-                    AND status = 'Rejected'
-            """)
-
-    return render_template("index.html",
-        q1=q1,
-        pct_intl=pct_intl,
-        avg_gpa=avg_gpa, avg_gre=avg_gre, avg_gre_v=avg_gre_v, avg_gre_aw=avg_gre_aw,
-        avg_gpa_us_fall2025=avg_gpa_us_fall2025,
-        pct_fall_accept=pct_fall_accept,
-        avg_gpa_fall_accepted=avg_gpa_fall_accepted,
-        jhu_ms_cs=jhu_ms_cs,
-        gtown_phd_cs_2025_accept=gtown_phd_cs_2025_accept,
-        berkeley=berkeley,
-        rejected=rejected
-    )
-
-is_scraping = False
-
-@app.route("/pull-data")
+            # one scan with conditional aggregates, shared with query_data.py
+            return analysis.compute(cur)
+
+# Results are reused until /update-analysis or a finished load refreshes them;
+# ANALYSIS_CACHE_DB shares them between worker processes
+analysis_cache = AnalysisCache(
+    compute_analysis,
+    ttl=float(os.environ.get("ANALYSIS_TTL", "300")),
+    path=os.environ.get("ANALYSIS_CACHE_DB"),
+)
+
+def run_update_job():
+    """Recompute the analysis now and replace the cached results."""
+    analysis_cache.refresh()
+
+@app.route("/")
+def index():
+    return render_template("index.html", pull=runner.status(), **analysis_cache.get())
+
+@app.route("/pool-stats")
+def pool_stats():
+    return jsonify(pool.stats())
+
+# Pulls run one at a time on a background thread (see jobs.py) and commit rows
+# in small batches; the dashboard cache is dropped after each batch and when a
+# pull finishes so new rows show up right away
+runner = JobRunner()
+runner.on_finish.append(lambda job: analysis_cache.invalidate())
+
+def scrape_job():
+    """The pull: module_2 scrape -> clean -> standardize -> load, reporting to the running job."""
+    jobs.run_pull(runner.current, get_conn, on_batch=lambda job: analysis_cache.invalidate())
+
+def _wants_json():
+    # the page's buttons submit GET forms; API clients POST and get JSON back
+    return request.method == "POST"
+
+@app.route("/pull-data", methods=["GET", "POST"])
 def pull_data():
-    global is_scraping
-    if is_scraping:
+    job = runner.start(lambda: scrape_job(), limit=jobs.pull_options()["limit"])
+    if job is None:
+        if _wants_json():
+            return jsonify(error="A pull is already running.", **runner.status()), 409
         flash("A pull is already running, please wait.")
         return redirect(url_for("index"))
+    if _wants_json():
+        return jsonify(started=True, **runner.status())
+    flash("Pull Data started. Refresh later to see updates.")
+    return redirect(url_for("index"))
 
-    def scrape_job():
-        global is_scraping
-        is_scraping = True
-        try:
-            # Where I call my module2 scraper
-            print("running scraper...")
-        finally:
-            is_scraping = False
+@app.route("/pull-data/status")
+def pull_status():
+    return jsonify(runner.status())
 
-    threading.Thread(target=scrape_job).start()
-    flash("Pull Data started. Refresh later to see updates.")
+@app.route("/pull-data/cancel", methods=["GET", "POST"])
+def cancel_pull():
+    cancelled = runner.cancel()
+    if _wants_json():
+        return jsonify(cancelled=cancelled, **runner.status()), 200 if cancelled else 409
+    flash("Cancelling the running pull." if cancelled else "No pull is running.")
     return redirect(url_for("index"))
 
-@app.route("/update-analysis")
+@app.route("/update-analysis", methods=["GET", "POST"])
 def update_analysis():
-    global is_scraping
-    if is_scraping:
-        flash("Cannot update analysis while Pull Data is running.")
-        return redirect(url_for("index"))
+    # a running pull commits its batches as they load, so this shows the partial progress
+    run_update_job()
+    pull = runner.status()
+    if _wants_json():
+        return jsonify(updated=True, **pull)
+    if pull["busy"]:
+        flash(f"Analysis updated with the {pull['job']['loaded']} rows loaded so far; Pull Data is still running.")
+    else:
+        flash("Analysis updated.")
     return redirect(url_for("index"))
 
-if __name__ == "__main__":
+if __name__ == "__main__":  # pragma: no cover
     app.run(debug=True)
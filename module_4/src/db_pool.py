@@ -0,0 +1,160 @@
+# db_pool.py
+# Thread-safe PostgreSQL connection pool for the Flask app.
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool's timeout."""
+
+
+class ConnectionPool:
+    """
+    Reuse connections across requests instead of connecting per request.
+
+    Connections are opened lazily (up to `maxconn`); when all are busy,
+    callers wait up to `timeout` seconds. A connection idle for longer than
+    `check_after` seconds is pinged with SELECT 1 before being handed out,
+    and connections older than `max_age` seconds or used `max_uses` times are
+    closed on release and replaced on demand. `stats()` reports pool size and
+    how long callers waited.
+    """
+
+    def __init__(self, connect, maxconn=10, timeout=5.0, check_after=30.0, max_age=1800.0, max_uses=10000):
+        self._connect = connect
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_after = check_after
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self._cond = threading.Condition()
+        self._idle = []        # [(conn, created, uses, last_used)]
+        self._size = 0         # open connections, idle + in use
+        self._meta = {}        # id(conn) -> (created, uses)
+        self.acquires = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.recycled = 0
+        self.broken = 0
+
+    def _healthy(self, conn, last_used):
+        if getattr(conn, "closed", 0):
+            return False
+        if time.monotonic() - last_used < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, created, uses, last_used = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    conn = None
+                    self._size += 1
+                    break
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(f"no connection free after {timeout:.1f}s ({self.maxconn} in use)")
+                waited = True
+                self._cond.wait(remaining)
+            wait = time.monotonic() - started
+            self.acquires += 1
+            if waited:
+                self.waits += 1
+            self.wait_seconds += wait
+            self.wait_max = max(self.wait_max, wait)
+
+        if conn is not None and not self._healthy(conn, last_used):
+            with self._cond:
+                self.broken += 1
+            self._close(conn)
+            conn = None
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            created, uses = time.monotonic(), 0
+        self._meta[id(conn)] = (created, uses + 1)
+        return conn
+
+    def release(self, conn, discard=False):
+        created, uses = self._meta.pop(id(conn), (time.monotonic(), 0))
+        now = time.monotonic()
+        expired = now - created >= self.max_age or uses >= self.max_uses
+        if discard or expired or getattr(conn, "closed", 0):
+            self._close(conn)
+            with self._cond:
+                self._size -= 1
+                if expired and not discard:
+                    self.recycled += 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((conn, created, uses, now))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commit on success, roll back on error, then return it."""
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                self.release(conn, discard=True)
+                raise
+            self.release(conn)
+            raise
+        self.release(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "maxconn": self.maxconn,
+                "acquires": self.acquires,
+                "waits": self.waits,
+                "wait_avg_ms": 1000 * self.wait_seconds / max(1, self.acquires),
+                "wait_max_ms": 1000 * self.wait_max,
+                "timeouts": self.timeouts,
+                "recycled": self.recycled,
+                "broken": self.broken,
+            }
+
+    def closeall(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, *_ in idle:
+            self._close(conn)
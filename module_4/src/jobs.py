@@ -0,0 +1,345 @@
+# jobs.py
+# Background "Pull Data" job: module_2 scrape -> clean -> standardize -> load,
+# streamed into PostgreSQL in small batches, one job at a time, with progress
+# counters for the status endpoint.
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.request
+from itertools import islice
+
+import load_data
+
+MODULE_2 = os.environ.get(
+    "MODULE2_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "module_2")
+)
+
+STANDARDIZE_BATCH = 50
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+
+class PullBusy(Exception):
+    """Raised when another process already holds the pull lock."""
+
+
+class Job:
+    """One pull run: state, progress counters and a cancellation flag."""
+
+    def __init__(self, job_id, limit=None):
+        self.id = job_id
+        self.limit = limit
+        self.state = "running"
+        self.stage = "starting"
+        self.started = time.time()
+        self.finished = None
+        self.error = None
+        self.fetched = 0
+        self.standardized = 0
+        self.loaded = 0
+        self.written = 0
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        """Stop the job at a safe point if cancellation was requested."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def status(self):
+        elapsed = max(1e-9, (self.finished or time.time()) - self.started)
+        rate = self.fetched / elapsed
+        eta = None
+        if self.state == "running" and self.limit and rate > 0:
+            eta = max(0.0, (self.limit - self.fetched) / rate)
+        return {
+            "id": self.id,
+            "state": self.state,
+            "stage": self.stage,
+            "started": self.started,
+            "finished": self.finished,
+            "elapsed": elapsed,
+            "limit": self.limit,
+            "fetched": self.fetched,
+            "standardized": self.standardized,
+            "loaded": self.loaded,
+            "written": self.written,
+            "rate": rate,
+            "eta": eta,
+            "error": self.error,
+        }
+
+
+class JobRunner:
+    """
+    Run at most one job at a time on a background thread.
+
+    `start()` claims the single slot under a lock, so two requests can never
+    both start a pull; it returns None while a job is running. Callbacks in
+    `on_finish` run after every job, whatever its outcome.
+
+    The slot is per process: with several web workers each has its own
+    runner, and run_pull's PostgreSQL advisory lock is what keeps their
+    pulls from overlapping (the later one fails with PullBusy).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self.current = None     # the running job, if any
+        self.last = None        # the most recent job, running or finished
+        self.on_finish = []
+
+    @property
+    def busy(self):
+        return self.current is not None
+
+    def start(self, fn, limit=None):
+        with self._lock:
+            if self.current is not None:
+                return None
+            job = Job(self._next_id, limit=limit)
+            self._next_id += 1
+            self.current = self.last = job
+        thread = threading.Thread(target=self._run, args=(job, fn))
+        thread.daemon = True
+        thread.start()
+        return job
+
+    def _run(self, job, fn):
+        try:
+            fn()
+            job.state = "cancelled" if job.cancelled else "succeeded"
+        except JobCancelled:
+            job.state = "cancelled"
+        except Exception as exc:
+            job.state = "failed"
+            job.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            job.finished = time.time()
+            job.stage = "done"
+            try:
+                for callback in self.on_finish:
+                    callback(job)
+            finally:
+                # free the slot only after the callbacks, so the next job sees their effects
+                with self._lock:
+                    if self.current is job:
+                        self.current = None
+
+    def cancel(self):
+        job = self.current
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def status(self):
+        job = self.last
+        return {"busy": self.busy, "job": job.status() if job else None}
+
+
+# ---------------- pull pipeline ----------------
+
+def _module_2():
+    """Import the module_2 scraper and cleaner (flat modules, so put the folder on sys.path)."""
+    path = os.path.abspath(MODULE_2)
+    if path not in sys.path:
+        sys.path.append(path)
+    from scrape import scrape_data
+    from clean import clean_data
+    return scrape_data, clean_data
+
+
+def applicant_row(rec):
+    """Map a cleaned module_2 record to the applicants columns load_data expects."""
+    program, university = rec.get("program"), rec.get("university")
+    return {
+        "result_id": rec.get("result_id"),
+        # "Program, University" is the text the standardizer splits
+        "program": ", ".join(p for p in (program, university) if p) or None,
+        "comments": rec.get("Notes"),
+        "date_added": rec.get("date_added"),
+        "url": rec.get("url"),
+        "status": rec.get("status"),
+        "term": rec.get("term"),
+        "us_or_international": rec.get("US/International"),
+        "gpa": rec.get("gpa"),
+        "gre": rec.get("gre"),
+        "gre_v": rec.get("gre_v"),
+        "gre_aw": rec.get("gre_aw"),
+        "degree": rec.get("Degree"),
+        "llm_generated_program": rec.get("llm_generated_program"),
+        "llm_generated_university": rec.get("llm_generated_university"),
+    }
+
+
+def standardize(rows, url, timeout=300):
+    """Fill llm_generated_program/university from the module_2 standardizer service (POST /standardize)."""
+    body = json.dumps({"rows": [{"program": r["program"] or ""} for r in rows]}).encode("utf-8")
+    req = urllib.request.Request(
+        url.rstrip("/") + "/standardize", data=body, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        out = json.loads(resp.read())["rows"]
+    for row, std in zip(rows, out):
+        row["llm_generated_program"] = std.get("llm-generated-program")
+        row["llm_generated_university"] = std.get("llm-generated-university")
+    return rows
+
+
+def pull_options():
+    """Scraper settings for a pull, from the environment."""
+    return {
+        "limit": int(os.environ.get("PULL_LIMIT", "500")),
+        "workers": int(os.environ.get("PULL_WORKERS", "4")),
+        "max_per_second": float(os.environ.get("PULL_MAX_PER_SECOND", "4")),
+        # id ranges earlier pulls fetched are kept here, so each pull only
+        # fetches results newer than them; PULL_BACKLOG=1 resumes below a
+        # pull the limit cut short instead
+        "state_path": os.environ.get("PULL_STATE_PATH", "pull_state.json"),
+        "backlog": os.environ.get("PULL_BACKLOG") == "1",
+    }
+
+
+# Session-level, so it outlives each batch's commit; released in run_pull's finally
+# (or by the server if the connection drops)
+PULL_LOCK_SQL = "SELECT pg_try_advisory_lock(hashtext('applicants_pull'))"
+PULL_UNLOCK_SQL = "SELECT pg_advisory_unlock(hashtext('applicants_pull'))"
+
+FLUSH_ROWS = int(os.environ.get("PULL_FLUSH_ROWS", "100"))
+FLUSH_SECONDS = float(os.environ.get("PULL_FLUSH_SECONDS", "5"))
+# longest the loader waits on the scraper before re-checking cancellation
+POLL_SECONDS = 0.5
+
+_DONE = object()
+
+
+def _put(out, item, stop):
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=POLL_SECONDS)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _feed(records, out, stop):
+    """Scraper thread: hand each record to the loader, then _DONE (or the error that ended the scrape)."""
+    try:
+        for rec in records:
+            if not _put(out, rec, stop):
+                return
+        _put(out, _DONE, stop)
+    except Exception as exc:
+        _put(out, exc, stop)
+    finally:
+        # stops the scraper's workers once the loader has gone (cancel or error)
+        records.close()
+
+
+def run_pull(job, get_conn, options=None, standardizer_url=None,
+             flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS, on_batch=None):
+    """
+    Scrape new results and upsert them into applicants as they arrive.
+
+    Scraped records are buffered, then cleaned as one batch and written
+    (standardized first, when a standardizer URL is configured) every
+    `flush_rows` records or once the oldest buffered one is `flush_seconds`
+    old, even while the scraper is stalled, so the table fills in while the
+    scrape runs and memory stays bounded by one batch. Each batch is
+    committed on its own; `on_batch(job)` runs after every commit. A
+    cancelled or failed pull keeps the batches already written.
+
+    The pull holds a PostgreSQL advisory lock on one pooled connection
+    throughout and raises PullBusy if another process holds it.
+    """
+    options = dict(options or pull_options())
+    standardizer_url = standardizer_url or os.environ.get("STANDARDIZER_URL")
+
+    with get_conn() as guard:
+        with guard.cursor() as cur:
+            cur.execute(PULL_LOCK_SQL)
+            if not cur.fetchone()[0]:
+                raise PullBusy("another worker is already running a pull")
+        try:
+            load_data.create_schema(guard)
+            guard.commit()
+            _pull(job, get_conn, options, standardizer_url, flush_rows, flush_seconds, on_batch)
+        finally:
+            guard.rollback()
+            with guard.cursor() as cur:
+                cur.execute(PULL_UNLOCK_SQL)
+
+
+def _pull(job, get_conn, options, standardizer_url, flush_rows, flush_seconds, on_batch):
+    scrape_data, clean_data = _module_2()
+
+    def flush(raw):
+        # one clean_batch per flush instead of cleaning record by record
+        rows = [applicant_row(rec.to_dict()) for rec in clean_data.clean_batch(raw)]
+        if standardizer_url:
+            job.stage = "standardizing"
+            it = iter(rows)
+            while chunk := list(islice(it, STANDARDIZE_BATCH)):
+                standardize(chunk, standardizer_url)
+                job.standardized += len(chunk)
+        job.stage = "loading"
+        # a second pooled connection per batch, so a slow scrape only holds the guard
+        with get_conn() as conn:
+            total, written = load_data.load_records(conn, rows, batch_size=len(rows))
+        job.loaded += total
+        job.written += written
+        if on_batch:
+            on_batch(job)
+        job.stage = "scraping"
+
+    job.stage = "scraping"
+    scraper = scrape_data(eager=False, compact=True, **options)
+    # the scrape runs on its own thread, so a stalled page fetch can't hold
+    # back the age flush; the queue keeps at most one batch in flight
+    pending = queue.Queue(maxsize=flush_rows)
+    stop = threading.Event()
+    threading.Thread(target=_feed, args=(scraper.iter_records(), pending, stop), daemon=True).start()
+    raw, oldest = [], None
+    try:
+        while True:
+            job.check()
+            wait = POLL_SECONDS if oldest is None else oldest + flush_seconds - time.monotonic()
+            try:
+                item = pending.get(timeout=min(POLL_SECONDS, max(0.0, wait)))
+            except queue.Empty:
+                item = None
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if item is not None:
+                raw.append(item)
+                job.fetched += 1
+                if oldest is None:
+                    oldest = time.monotonic()
+            if raw and (len(raw) >= flush_rows or time.monotonic() - oldest >= flush_seconds):
+                flush(raw)
+                raw, oldest = [], None
+        job.check()
+        if raw:
+            flush(raw)
+        # the scraper finished walking before these last batches loaded, so its
+        # state file is only updated now (a failed flush leaves them to the next pull)
+        scraper.commit_state()
+    finally:
+        stop.set()
@@ -1,25 +1,85 @@
+import argparse
+import io
 import json
+import mmap
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
 import psycopg2
+from psycopg2.extras import execute_values
+
+from analysis_cache import invalidate_shared
+from summary import create_summary, rebuild_summary
+
+BATCH_SIZE = 1000          # records handed to the loader at a time
+CHUNK_SIZE = 1 << 20       # characters read per step when parsing a .json array
+RESULT_ID_RE = re.compile(r"/result/(\d+)")
+
+
+def iter_jsonl(path, start=0, end=None):
+    """Yield one record per non-blank line in bytes [start, end), reading the file through mmap."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            mm.seek(start)
+            stop = len(mm) if end is None else end
+            while mm.tell() < stop:
+                line = mm.readline().strip()
+                if line:
+                    yield json.loads(line)
+
+
+def iter_json_array(path, chunk_size=CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof, started = "", 0, False, False
+        while True:
+            # skip whitespace (and commas between elements)
+            while pos < len(buf) and (buf[pos].isspace() or (started and buf[pos] == ",")):
+                pos += 1
+            if pos == len(buf):
+                if eof:
+                    raise ValueError(f"{path}: unexpected end of JSON array")
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+                continue
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"{path}: expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # element runs past the buffer: keep the unread tail and read more
+                more = f.read(chunk_size)
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield obj
+            pos = end
+
+
+def batched(records, size=BATCH_SIZE):
+    """Group an iterable into lists of at most `size` items."""
+    it = iter(records)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
 
-# Prompt the user for inputs
-json_path = input("Path to JSON (.json) or JSON Lines (.jsonl/.ndjson): ").strip()
-host = input("PostgreSQL host [localhost]: ").strip() or "localhost"
-port = int(input("PostgreSQL port [5432]: ").strip() or "5432")
-dbname = input("Database name: ").strip()
-user = input("User: ").strip()
-password = input("Password: ").strip()
-
-# Parse the json file
-records = []
-if json_path.lower().endswith((".jsonl", ".ndjson")):
-    with open(json_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                records.append(json.loads(line))
-else:
-    with open(json_path, "r", encoding="utf-8") as f:
-        records = json.load(f)
 
 # Helper: convert empty-like strings to None; convert numeric fields to float or None
 def to_null(v, numeric=False):
@@ -35,12 +95,13 @@ def to_null(v, numeric=False):
             return None
     return s
 
-# Connect to Database
-conn = psycopg2.connect(host=host, port=port, dbname=dbname, user=user, password=password)
-cur = conn.cursor()
 
-# Create table
-cur.execute("""
+def connect(dsn=None):
+    """Open a connection from a DSN/URL, DATABASE_URL, or the standard PG* variables."""
+    return psycopg2.connect(dsn or os.environ.get("DATABASE_URL", ""))
+
+
+SCHEMA = """
     CREATE TABLE IF NOT EXISTS applicants (
         p_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
         program TEXT,
@@ -56,30 +117,312 @@ cur.execute("""
         gre_aw FLOAT,
         degree TEXT,
         llm_generated_program TEXT,
-        llm_generated_university TEXT
+        llm_generated_university TEXT,
+        result_id TEXT
     );
-""")
+"""
+
+# result_id is the natural key. Tables from before it existed (module_3) are
+# upgraded once: ALTER TABLE locks out every reader and writer even when the
+# column is already there, and the legacy check scans the whole table, so
+# both only run while the column or its unique index is missing.
+UPGRADE_CHECK_SQL = """
+    SELECT
+        EXISTS (SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'applicants'
+                  AND column_name = 'result_id'),
+        to_regclass('applicants_result_id_key') IS NOT NULL
+"""
+ADD_RESULT_ID_SQL = "ALTER TABLE applicants ADD COLUMN IF NOT EXISTS result_id TEXT"
+
+# Rows loaded before result_id existed only carry it in their URL. Duplicates
+# of one result (repeated loads) are collapsed first, keeping a row that
+# already has result_id or else the newest, so the backfill can't collide.
+LEGACY_SQL = "SELECT EXISTS (SELECT 1 FROM applicants WHERE result_id IS NULL AND url ~ '/result/[0-9]+')"
+DEDUPE_SQL = r"""
+    WITH legacy AS (
+        SELECT DISTINCT substring(url from '/result/(\d+)') AS rid
+        FROM applicants WHERE result_id IS NULL AND url ~ '/result/\d+'
+    ), ranked AS (
+        SELECT a.p_id, row_number() OVER (
+            PARTITION BY l.rid ORDER BY (a.result_id IS NOT NULL) DESC, a.p_id DESC
+        ) AS rn
+        FROM applicants a
+        JOIN legacy l ON l.rid = COALESCE(a.result_id, substring(a.url from '/result/(\d+)'))
+    )
+    DELETE FROM applicants WHERE p_id IN (SELECT p_id FROM ranked WHERE rn > 1)
+"""
+BACKFILL_SQL = r"""
+    UPDATE applicants SET result_id = substring(url from '/result/(\d+)')
+    WHERE result_id IS NULL AND url ~ '/result/\d+'
+"""
+
+INDEXES = "CREATE UNIQUE INDEX IF NOT EXISTS applicants_result_id_key ON applicants (result_id)"
 
-# Insert rows
-columns = [
-    "program","comments","date_added","url","status","term",
+# the per-filter indexes from before the summary table: every dashboard metric
+# now comes from applicants_summary (or one full-scan aggregate), so they only
+# slowed COPY and upserts down (no lock is taken once they are gone)
+OLD_INDEXES = """
+    DROP INDEX IF EXISTS applicants_term_status_idx, applicants_gpa_term_idx,
+        applicants_intl_idx, applicants_llm_idx;
+"""
+
+
+def create_schema(conn):
+    """
+    Create or upgrade the applicants table, its indexes and the summary table.
+    Returns how many duplicate legacy rows the one-time result_id backfill
+    deleted (0 once the table is upgraded).
+    """
+    removed = 0
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA)
+        cur.execute(UPGRADE_CHECK_SQL)
+        if not all(cur.fetchone()):
+            cur.execute(ADD_RESULT_ID_SQL)
+            cur.execute(LEGACY_SQL)
+            if cur.fetchone()[0]:
+                cur.execute(DEDUPE_SQL)
+                removed = cur.rowcount
+                cur.execute(BACKFILL_SQL)
+            cur.execute(INDEXES)
+        cur.execute(OLD_INDEXES)
+        cur.execute("SELECT to_regclass('applicants_summary') IS NULL")
+        new_summary = cur.fetchone()[0]
+        create_summary(cur)
+    conn.commit()
+    # rows loaded before the summary triggers existed are counted once here
+    if new_summary:
+        rebuild_summary(conn)
+    return removed
+
+
+# Upsert rows keyed on result_id
+COLUMNS = [
+    "result_id","program","comments","date_added","url","status","term",
     "us_or_international","gpa","gre","gre_v","gre_aw","degree",
     "llm_generated_program","llm_generated_university"
 ]
+NUMERIC = ("gpa","gre","gre_v","gre_aw")
+DATA_COLUMNS = [c for c in COLUMNS if c != "result_id"]
+
+# Only rows whose values actually changed are rewritten
+UPSERT_CLAUSE = (
+    "ON CONFLICT (result_id) DO UPDATE SET "
+    + ", ".join(f"{c} = EXCLUDED.{c}" for c in DATA_COLUMNS)
+    + f" WHERE ({', '.join('applicants.' + c for c in DATA_COLUMNS)})"
+    + f" IS DISTINCT FROM ({', '.join('EXCLUDED.' + c for c in DATA_COLUMNS)})"
+)
+
+
+def result_id_of(rec):
+    rid = to_null(rec.get("result_id"))
+    if rid is None:
+        m = RESULT_ID_RE.search(str(rec.get("url") or ""))
+        rid = m.group(1) if m else None
+    return rid
+
+
+# Low-cardinality columns are stored as one canonical spelling per value so
+# equality filters (and their indexes) match every variant the sources produce.
+CANONICAL = {
+    "status": {
+        "accepted": "Accepted", "rejected": "Rejected", "interview": "Interview",
+        "wait listed": "Wait listed", "waitlisted": "Wait listed", "other": "Other",
+    },
+    "us_or_international": {
+        "american": "American", "us": "American", "u.s.": "American", "domestic": "American",
+        "international": "International", "other": "Other",
+    },
+    "degree": {
+        "masters": "Masters", "master's": "Masters", "master": "Masters", "ms": "Masters", "ma": "Masters",
+        "phd": "PhD", "ph.d.": "PhD", "ph.d": "PhD", "psyd": "PsyD", "mfa": "MFA", "mba": "MBA",
+        "jd": "JD", "edd": "EdD", "ind": "IND", "other": "Other",
+    },
+}
+TERM_RE = re.compile(r"^(fall|spring|summer|winter)\s+(\d{4})$", re.IGNORECASE)
+
+
+def canonical(column, value):
+    """Map a low-cardinality value to its canonical spelling (unknown values pass through)."""
+    if value is None:
+        return None
+    if column == "term":
+        m = TERM_RE.match(value)
+        return f"{m.group(1).capitalize()} {m.group(2)}" if m else value
+    return CANONICAL[column].get(" ".join(value.lower().split()), value)
+
+
+def row_values(rec):
+    vals = [result_id_of(rec)]
+    for c in COLUMNS[1:]:
+        v = to_null(rec.get(c), numeric=c in NUMERIC)
+        if c == "term" or c in CANONICAL:
+            v = canonical(c, v)
+        vals.append(v)
+    return vals
 
-placeholders = ",".join(["%s"]*len(columns))
-sql = f"INSERT INTO applicants ({','.join(columns)}) VALUES ({placeholders});"
 
-for rec in records:
-    vals = []
-    for c in columns:
-        if c in ("gpa","gre","gre_v","gre_aw"):
-            vals.append(to_null(rec.get(c), numeric=True))
+def dedupe(batch):
+    """Row values for a batch, keeping only the last record per result_id
+    (ON CONFLICT cannot touch the same row twice in one statement)."""
+    rows, keyed = [], {}
+    for rec in batch:
+        vals = row_values(rec)
+        if vals[0] is None:
+            rows.append(vals)
         else:
-            vals.append(to_null(rec.get(c), numeric=False))
-    cur.execute(sql, vals)
+            keyed[vals[0]] = vals
+    return rows + list(keyed.values())
+
+
+# COPY text format: tab-separated, \N for NULL, backslash escapes
+def _copy_field(v):
+    if v is None:
+        return "\\N"
+    return (str(v).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def copy_batch(cur, batch):
+    """COPY a batch into the session's staging table, then merge it with one upsert."""
+    cols = ",".join(COLUMNS)
+    buf = io.StringIO()
+    for vals in dedupe(batch):
+        buf.write("\t".join(_copy_field(v) for v in vals))
+        buf.write("\n")
+    buf.seek(0)
+    cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS applicants_stage AS SELECT {cols} FROM applicants WITH NO DATA;")
+    cur.execute("TRUNCATE applicants_stage;")
+    cur.copy_expert(f"COPY applicants_stage ({cols}) FROM STDIN", buf)
+    cur.execute(f"INSERT INTO applicants ({cols}) SELECT {cols} FROM applicants_stage {UPSERT_CLAUSE};")
+    return cur.rowcount
+
+
+def insert_batch(cur, batch):
+    rows = dedupe(batch)
+    sql = f"INSERT INTO applicants ({','.join(COLUMNS)}) VALUES %s {UPSERT_CLAUSE}"
+    execute_values(cur, sql, rows, page_size=len(rows))
+    return cur.rowcount
+
+
+LOADERS = {"copy": copy_batch, "insert": insert_batch}
+
+
+def load_records(conn, records, mode="copy", batch_size=BATCH_SIZE):
+    """
+    Upsert records in batches over one connection; returns (rows read, rows written).
+
+    Every batch is committed on its own, so an interrupted load keeps its
+    progress and simply re-runs idempotently.
+    """
+    load_batch = LOADERS[mode]
+    total = written = 0
+    with conn.cursor() as cur:
+        for batch in batched(records, batch_size):
+            written += load_batch(cur, batch)
+            conn.commit()
+            total += len(batch)
+    return total, written
+
+
+def is_jsonl(path):
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        return True
+    # standardizer output is sometimes JSON Lines saved as .json, so sniff the first character
+    with open(path, "rb") as f:
+        head = f.read(4096).lstrip()
+    return not head.startswith(b"[")
+
+
+def iter_records(path):
+    """Stream records from a JSON Lines or JSON array file."""
+    return iter_jsonl(path) if is_jsonl(path) else iter_json_array(path)
+
+
+def partition_offsets(path, partitions):
+    """Split a JSON Lines file into up to `partitions` byte ranges that start on line boundaries."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, partitions):
+            f.seek(max(bounds[-1], size * i // partitions))
+            f.readline()
+            pos = min(f.tell(), size)
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _load_partition(args):
+    path, start, end, dsn, mode, batch_size = args
+    conn = connect(dsn)
+    try:
+        return load_records(conn, iter_jsonl(path, start, end), mode, batch_size)
+    finally:
+        conn.close()
+
+
+def load_file(path, dsn=None, mode="copy", partitions=1, batch_size=BATCH_SIZE):
+    """
+    Load a JSON/JSONL file into applicants; returns {"rows", "written", "seconds", "deduplicated"}
+    (the last counts duplicate legacy rows removed while upgrading an old table).
+
+    With `partitions` > 1 a JSON Lines file is split into line-aligned byte
+    ranges that separate processes parse and upsert over their own
+    connections. JSON arrays are always loaded over one connection.
+    """
+    if mode not in LOADERS:
+        raise ValueError(f"unknown load mode {mode!r} (expected one of {sorted(LOADERS)})")
+    started = time.perf_counter()
+    conn = connect(dsn)
+    try:
+        deduplicated = create_schema(conn)
+        if partitions > 1 and is_jsonl(path):
+            ranges = partition_offsets(path, partitions)
+            jobs = [(path, start, end, dsn, mode, batch_size) for start, end in ranges]
+            with ProcessPoolExecutor(max_workers=len(jobs) or 1) as pool:
+                results = list(pool.map(_load_partition, jobs))
+        else:
+            results = [load_records(conn, iter_records(path), mode, batch_size)]
+        # refresh planner statistics right away rather than waiting for autovacuum
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE applicants;")
+        conn.commit()
+    finally:
+        conn.close()
+    # tell dashboard workers sharing an analysis cache that the data changed
+    if os.environ.get("ANALYSIS_CACHE_DB"):
+        invalidate_shared(os.environ["ANALYSIS_CACHE_DB"])
+    return {
+        "rows": sum(r[0] for r in results),
+        "written": sum(r[1] for r in results),
+        "seconds": time.perf_counter() - started,
+        "deduplicated": deduplicated,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load applicant JSON/JSONL into PostgreSQL.")
+    parser.add_argument("path", help="JSON (.json) or JSON Lines (.jsonl/.ndjson) file")
+    parser.add_argument("--dsn", default=None,
+                        help="libpq DSN or URL (default: DATABASE_URL, then PGHOST/PGUSER/... variables)")
+    parser.add_argument("--mode", choices=sorted(LOADERS), default="copy")
+    parser.add_argument("--partitions", type=int, default=1,
+                        help="Load a JSON Lines file as this many concurrent partitions")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    stats = load_file(args.path, args.dsn, args.mode, max(1, args.partitions), args.batch_size)
+    if stats["deduplicated"]:
+        print(f"Upgraded applicants to result_id keys; removed {stats['deduplicated']} duplicate rows.")
+    print(
+        f"Done. Read {stats['rows']} rows, inserted or updated {stats['written']}, in {stats['seconds']:.2f}s "
+        f"({stats['rows'] / max(stats['seconds'], 1e-9):.0f} rows/sec, {args.mode})."
+    )
+    return 0
+
 
-conn.commit()
-cur.close()
-conn.close()
-print("Done.")
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
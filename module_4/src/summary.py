@@ -0,0 +1,151 @@
+# summary.py
+# applicants_summary: one row per combination of the dashboard's filter columns
+# with row counts and exact GPA/GRE sums and non-null counts. Statement-level
+# triggers on applicants apply the change of every INSERT/UPDATE/DELETE
+# (including load_data's upserts), so analysis.py answers from a few thousand
+# rows instead of scanning every applicant.
+#
+#   python summary.py rebuild     # recompute from applicants
+#   python summary.py check       # compare summary answers with a full scan
+
+import argparse
+import sys
+
+import analysis
+
+DIMENSIONS = ["term", "status", "us_or_international", "degree",
+              "llm_generated_university", "llm_generated_program"]
+MEASURES = ["gpa", "gre", "gre_v", "gre_aw"]
+
+_DIMS = ", ".join(DIMENSIONS)
+_TOTALS = ["n"] + [f"{m}_{part}" for m in MEASURES for part in ("sum", "n")]
+
+
+def _delta(source, sign):
+    """Per-row contributions of `source` rows, negated for removed rows."""
+    dims = ", ".join(f"COALESCE({d}, '') AS {d}" for d in DIMENSIONS)
+    measures = ", ".join(
+        f"{sign} * {m}::numeric AS {m}_sum, {sign} * ({m} IS NOT NULL)::int AS {m}_n" for m in MEASURES
+    )
+    return f"SELECT {dims}, {sign} AS n, {measures} FROM {source}"
+
+
+def _merge(*parts):
+    """Fold row contributions into applicants_summary grouped by the dimensions."""
+    sums = ", ".join(f"COALESCE(SUM({t}), 0)" for t in _TOTALS)
+    updates = ", ".join(f"{t} = s.{t} + EXCLUDED.{t}" for t in _TOTALS)
+    union = " UNION ALL ".join(parts)
+    return (
+        f"INSERT INTO applicants_summary AS s ({_DIMS}, {', '.join(_TOTALS)}) "
+        # fixed row order keeps concurrent loads locking summary rows in the same order
+        f"SELECT {_DIMS}, {sums} FROM ({union}) d GROUP BY {_DIMS} ORDER BY {_DIMS} "
+        f"ON CONFLICT ({_DIMS}) DO UPDATE SET {updates}"
+    )
+
+
+def _trigger_function(name, body):
+    # One writer at a time: an upsert fires the INSERT and UPDATE triggers as
+    # separate merges, so concurrent loads (load_data --partitions) could lock
+    # the same hot summary rows in different orders. The lock is held to commit.
+    return f"""
+    CREATE OR REPLACE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM pg_advisory_xact_lock(hashtext('applicants_summary'));
+        {body};
+        RETURN NULL;
+    END $$;"""
+
+
+SUMMARY_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS applicants_summary (
+        {", ".join(f"{d} TEXT NOT NULL" for d in DIMENSIONS)},
+        n BIGINT NOT NULL,
+        {", ".join(f"{m}_sum NUMERIC NOT NULL, {m}_n BIGINT NOT NULL" for m in MEASURES)},
+        PRIMARY KEY ({_DIMS})
+    );
+    {_trigger_function("applicants_summary_ins", _merge(_delta("new_rows", 1)))}
+    {_trigger_function("applicants_summary_upd",
+                       _merge(_delta("new_rows", 1), _delta("old_rows", -1))
+                       + "; DELETE FROM applicants_summary WHERE n = 0")}
+    {_trigger_function("applicants_summary_del",
+                       _merge(_delta("old_rows", -1)) + "; DELETE FROM applicants_summary WHERE n = 0")}
+"""
+
+# Created only when missing: CREATE/DROP TRIGGER lock applicants against every
+# reader and writer, and create_schema runs before each load and pull
+TRIGGERS = {
+    "applicants_summary_ins": "AFTER INSERT ON applicants REFERENCING NEW TABLE AS new_rows",
+    "applicants_summary_upd": "AFTER UPDATE ON applicants REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "applicants_summary_del": "AFTER DELETE ON applicants REFERENCING OLD TABLE AS old_rows",
+}
+MISSING_TRIGGERS_SQL = """
+    SELECT name FROM unnest(%s::text[]) AS name
+    WHERE NOT EXISTS (
+        SELECT 1 FROM pg_trigger WHERE tgrelid = 'applicants'::regclass AND tgname = name
+    )
+"""
+
+# Full recompute; SHARE mode blocks writers (and so the triggers) until commit
+REBUILD_SQL = f"""
+    LOCK TABLE applicants IN SHARE MODE;
+    TRUNCATE applicants_summary;
+    {_merge(_delta("applicants", 1))};
+"""
+
+
+def create_summary(cur):
+    """Create the summary table and its triggers (idempotent; run after the applicants table exists)."""
+    cur.execute(SUMMARY_SCHEMA)
+    cur.execute(MISSING_TRIGGERS_SQL, (list(TRIGGERS),))
+    for (name,) in cur.fetchall():
+        cur.execute(f"CREATE TRIGGER {name} {TRIGGERS[name]} FOR EACH STATEMENT EXECUTE FUNCTION {name}()")
+
+
+def rebuild_summary(conn):
+    """Recompute applicants_summary from scratch; returns the number of summary rows."""
+    with conn.cursor() as cur:
+        cur.execute(REBUILD_SQL)
+        cur.execute("SELECT COUNT(*) FROM applicants_summary")
+        rows = cur.fetchone()[0]
+    conn.commit()
+    return rows
+
+
+def check_summary(conn):
+    """Names of metrics whose summary answer differs from a full scan (empty when exact)."""
+    with conn.cursor() as cur:
+        fast = analysis.compute(cur, summary=True)
+        scan = analysis.compute(cur, summary=False)
+    conn.rollback()
+    return [
+        name for name in fast
+        if not (fast[name] == scan[name] or (
+            fast[name] is not None and scan[name] is not None and abs(fast[name] - scan[name]) < 1e-9))
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the applicants_summary table.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--dsn", default=None,
+                        help="libpq DSN or URL (default: DATABASE_URL, then PGHOST/PGUSER/... variables)")
+    args = parser.parse_args(argv)
+
+    from load_data import connect
+
+    conn = connect(args.dsn)
+    try:
+        if args.command == "rebuild":
+            with conn.cursor() as cur:
+                create_summary(cur)
+            print(f"Rebuilt applicants_summary: {rebuild_summary(conn)} rows.")
+            return 0
+        diff = check_summary(conn)
+        print("Summary matches a full scan." if not diff else f"Summary differs for: {', '.join(diff)}")
+        return 1 if diff else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Analysis results cache (no database needed).
+
+a. In-process cache
+i. Results are served from memory until the TTL expires
+ii. refresh() recomputes immediately; concurrent misses compute once
+iii. An invalidate() that lands while a result is being computed is not lost
+b. Shared store
+i. A second worker reuses results computed by the first
+ii. invalidate_shared() (the load-completion signal) makes every worker recompute
+iii. refresh() in one worker (Update Analysis) is served by every other worker
+
+"""
+
+# tests/test_analysis_cache.py
+import threading
+import time
+import pytest
+from analysis_cache import AnalysisCache, invalidate_shared
+
+
+class _Counter:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+            return {"q1": self.calls, "pct_intl": 12.5}
+
+
+# a.i — memory hits until the TTL expires
+@pytest.mark.analysis
+def test_served_from_memory_until_ttl():
+    compute = _Counter()
+    cache = AnalysisCache(compute, ttl=0.05)
+    assert cache.get()["q1"] == 1
+    assert cache.get()["q1"] == 1
+    assert cache.hits == 1 and compute.calls == 1
+    time.sleep(0.06)
+    assert cache.get()["q1"] == 2
+
+
+# a.ii — explicit refresh and single-flight recomputation
+@pytest.mark.analysis
+def test_refresh_and_single_flight():
+    compute = _Counter(delay=0.05)
+    cache = AnalysisCache(compute, ttl=60)
+    threads = [threading.Thread(target=cache.get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert compute.calls == 1
+    assert cache.refresh()["q1"] == 2
+    assert cache.get()["q1"] == 2
+
+
+# a.iii — a pull batch invalidating during a dashboard compute
+@pytest.mark.analysis
+@pytest.mark.parametrize("shared", [False, True])
+def test_invalidate_during_compute_is_kept(tmp_path, shared):
+    entered, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        if len(calls) == 1:
+            entered.set()
+            release.wait(5)
+        return {"q1": len(calls)}
+
+    cache = AnalysisCache(compute, ttl=300, path=str(tmp_path / "cache.db") if shared else None)
+    reader = threading.Thread(target=cache.get)
+    reader.start()
+    entered.wait(5)
+    cache.invalidate()
+    release.set()
+    reader.join(5)
+    assert cache.get()["q1"] == 2
+    assert cache.get()["q1"] == 2 and len(calls) == 2
+
+
+# b.i — workers share one computation through SQLite
+@pytest.mark.analysis
+def test_shared_store_reused_across_workers(tmp_path):
+    path = str(tmp_path / "analysis.sqlite")
+    first, second = _Counter(), _Counter()
+    AnalysisCache(first, ttl=60, path=path).get()
+    assert AnalysisCache(second, ttl=60, path=path).get() == {"q1": 1, "pct_intl": 12.5}
+    assert second.calls == 0
+
+
+# b.ii — a finished load invalidates every worker
+@pytest.mark.analysis
+def test_load_signal_invalidates_workers(tmp_path):
+    path = str(tmp_path / "analysis.sqlite")
+    compute = _Counter()
+    cache = AnalysisCache(compute, ttl=60, path=path, recheck=0.0)
+    assert cache.get()["q1"] == 1
+    assert cache.get()["q1"] == 1
+    invalidate_shared(path)
+    assert cache.get()["q1"] == 2
+    assert compute.calls == 2
+
+
+# b.iii — Update Analysis in one worker reaches the others
+@pytest.mark.analysis
+def test_refresh_reaches_other_workers(tmp_path):
+    path = str(tmp_path / "analysis.sqlite")
+    compute_a, compute_b = _Counter(), _Counter()
+    a = AnalysisCache(compute_a, ttl=60, path=path, recheck=0.0)
+    b = AnalysisCache(compute_b, ttl=60, path=path, recheck=0.0)
+    assert a.get()["q1"] == 1
+    assert b.get()["q1"] == 1
+    assert a.refresh()["q1"] == 2
+    assert b.get()["q1"] == 2
+    assert a.get()["q1"] == 2
+    assert compute_a.calls == 2 and compute_b.calls == 0
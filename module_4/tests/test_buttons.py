@@ -6,15 +6,17 @@ ii. Triggers the loader with the rows from the scraper (should be faked / mocked
 b. Test POST /update-analysis (or whatever you named the path posting the update analysis request)
 i. Returns 200 when not busy
 c. Test busy gating
-i. When a pull is “in progress”, POST /update-analysis returns 409 (and performs no update).
+i. When a pull is “in progress”, POST /update-analysis still updates (pulls commit in batches) and reports the pull as busy.
 ii. When busy, POST /pull-data returns 409
 
 """
 
 # tests/test_buttons.py
-import types
+import threading
+import time
 import pytest
 import app as app_module
+import analysis
 
 # ---------- Helpers / Fakes ----------
 
@@ -39,19 +41,38 @@ class ImmediateThread:
         return
 
 
+class _FakeCursor:
+    def execute(self, *_):
+        return None
+
+    def fetchone(self):
+        # one aggregate row with every dashboard metric
+        return tuple(1 for _ in analysis.COLUMNS)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _FakeConn:
+    def cursor(self):
+        return _FakeCursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
 @pytest.fixture
 def app(monkeypatch):
     # Avoid touching a real DB anywhere in these tests
-    monkeypatch.setattr(app_module, "get_conn", lambda: types.SimpleNamespace(
-        __enter__=lambda s: s,
-        __exit__=lambda s, *exc: False,
-        cursor=lambda : types.SimpleNamespace(
-            __enter__=lambda s: s,
-            __exit__=lambda s, *exc: False,
-            execute=lambda *_: None,
-            fetchone=lambda : (1,)
-        )
-    ))
+    monkeypatch.setattr(app_module, "get_conn", lambda: _FakeConn())
+    # a fresh, idle job runner per test
+    monkeypatch.setattr(app_module, "runner", app_module.JobRunner())
     application = app_module.app
     application.config.update(TESTING=True)
     return application
@@ -70,7 +91,7 @@ def test_pull_data_returns_200_and_triggers_loader(client, monkeypatch):
     a.ii Triggers the loader with the rows from the scraper (mocked)
     """
     # Arrange: make the background job run synchronously
-    monkeypatch.setattr(app_module.threading, "Thread", ImmediateThread)
+    monkeypatch.setattr(app_module.jobs.threading, "Thread", ImmediateThread)
 
     # Fake "scraper rows" and capture what the loader receives
     scraped_rows = [{"id": 1}, {"id": 2}, {"id": 3}]
@@ -103,37 +124,42 @@ def test_update_analysis_returns_200_when_not_busy(client, monkeypatch):
     """
     b.i Returns 200 when not busy
     """
-    monkeypatch.setattr(app_module, "is_scraping", False, raising=False)
     resp = client.post("/update-analysis", follow_redirects=True)
     assert resp.status_code == 200, "Expected 200 when system is not busy"
 
 
 # ============ 2c) Busy-state gating ============
 
-def test_update_analysis_returns_409_when_busy_and_does_not_update(client, monkeypatch):
+@pytest.fixture
+def pull_running(app):
+    """Hold a job in the runner until the test ends, as a pull in progress would."""
+    release = threading.Event()
+    job = app_module.runner.start(lambda: release.wait(5))
+    yield job
+    release.set()
+    while app_module.runner.busy:
+        time.sleep(0.01)
+
+
+def test_update_analysis_runs_while_pull_in_progress(client, monkeypatch, pull_running):
     """
-    c.i When a pull is in progress, POST /update-analysis returns 409 and performs no update
+    c.i When a pull is in progress, POST /update-analysis still updates and reports the pull as busy
     """
-    # Simulate busy
-    monkeypatch.setattr(app_module, "is_scraping", True, raising=False)
-
-    # If your update route calls a function to recompute/refresh, guard it:
     updated = {"called": False}
     def fake_update_job():
         updated["called"] = True
-    # Expose a symbol the route would call (adjust if your code uses another name)
-    monkeypatch.setattr(app_module, "run_update_job", fake_update_job, raising=False)
+    monkeypatch.setattr(app_module, "run_update_job", fake_update_job)
 
     resp = client.post("/update-analysis")
 
-    assert resp.status_code == 409, "Expected 409 Conflict while busy"
-    assert not updated["called"], "Update must not run while busy"
+    assert resp.status_code == 200, "Pulls commit in batches, so updating shows their progress"
+    assert updated["called"], "Update must run while a pull is loading"
+    assert resp.get_json()["busy"] is True
 
 
-def test_pull_data_returns_409_when_busy(client, monkeypatch):
+def test_pull_data_returns_409_when_busy(client, pull_running):
     """
     c.ii When busy, POST /pull-data returns 409
     """
-    monkeypatch.setattr(app_module, "is_scraping", True, raising=False)
     resp = client.post("/pull-data")
     assert resp.status_code == 409, "Expected 409 Conflict when a pull is already in progress"
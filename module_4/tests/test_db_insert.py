@@ -106,7 +106,7 @@ def app(memdb, monkeypatch):
             if self.target:
                 self.target(*self.args, **self.kwargs)
 
-    monkeypatch.setattr(app_module.threading, "Thread", ImmediateThread)
+    monkeypatch.setattr(app_module.jobs.threading, "Thread", ImmediateThread)
 
     # Fake scrape job that inserts via SQL (so we exercise DB writes)
     sample_rows = [
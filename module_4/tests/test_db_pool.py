@@ -0,0 +1,225 @@
+"""Connection pool behaviour with fake connections (no database needed).
+
+a. Reuse and limits
+i. A released connection is handed out again instead of reconnecting
+ii. Callers wait for a free connection and time out when none is released
+b. Health and recycling
+i. A connection that fails its SELECT 1 check is replaced
+ii. Connections past max_uses are closed on release
+iii. Closed or unusable connections are dropped and failed connects free their slot
+iv. closeall() closes every idle connection
+c. Dashboard wiring
+i. /pool-stats reports pool metrics as JSON
+ii. The app connects with the PG* variables and routes borrow from its shared pool
+
+"""
+
+# tests/test_db_pool.py
+import threading
+import time
+import pytest
+import app as app_module
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        if self.conn.dead:
+            raise RuntimeError("server closed the connection")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _FakeConn:
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.commits = 0
+        self.rollbacks = 0
+        self.broken_rollback = False
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        if self.broken_rollback:
+            raise RuntimeError("connection lost")
+        self.rollbacks += 1
+
+    def close(self):
+        if self.closed:
+            raise RuntimeError("already closed")
+        self.closed = 1
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def make_pool(opened):
+    def connect():
+        conn = _FakeConn()
+        opened.append(conn)
+        return conn
+
+    def make(**kw):
+        return ConnectionPool(connect, **kw)
+
+    return make
+
+
+# a.i — released connections are reused
+@pytest.mark.db
+def test_connections_are_reused(make_pool, opened):
+    pool = make_pool(maxconn=2)
+    for _ in range(5):
+        with pool.connection() as conn:
+            pass
+    assert len(opened) == 1
+    assert conn.commits == 5
+    stats = pool.stats()
+    assert stats["acquires"] == 5 and stats["size"] == 1 and stats["idle"] == 1
+
+
+@pytest.mark.db
+def test_error_rolls_back_and_returns_connection(make_pool, opened):
+    pool = make_pool(maxconn=1)
+    with pytest.raises(ValueError):
+        with pool.connection():
+            raise ValueError("boom")
+    assert opened[0].rollbacks == 1
+    assert pool.stats()["idle"] == 1
+
+
+# a.ii — callers wait, then time out
+@pytest.mark.db
+def test_waits_for_release_then_times_out(make_pool):
+    pool = make_pool(maxconn=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    threading.Timer(0.02, pool.release, args=(held,)).start()
+    conn = pool.acquire(timeout=2)
+    assert conn is held
+    stats = pool.stats()
+    assert stats["timeouts"] == 1 and stats["waits"] >= 1 and stats["wait_max_ms"] > 0
+
+
+# b.i — stale connections failing the health check are replaced
+@pytest.mark.db
+def test_broken_connection_is_replaced(make_pool, opened):
+    pool = make_pool(maxconn=1, check_after=0.0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.dead = True
+    time.sleep(0.001)
+    fresh = pool.acquire()
+    assert fresh is not conn and conn.closed
+    assert pool.stats()["broken"] == 1 and len(opened) == 2
+    # a connection that passes the check is handed out again
+    pool.release(fresh)
+    time.sleep(0.001)
+    assert pool.acquire() is fresh and fresh.rollbacks == 1
+
+
+# b.ii — recycling after max_uses
+@pytest.mark.db
+def test_connections_recycled_after_max_uses(make_pool, opened):
+    pool = make_pool(maxconn=1, max_uses=2)
+    for _ in range(4):
+        with pool.connection():
+            pass
+    assert len(opened) == 2
+    assert opened[0].closed
+    assert pool.stats()["recycled"] == 2
+
+
+# b.iii — connections closed underneath the pool, unusable connections and failed connects
+@pytest.mark.db
+def test_closed_connection_is_replaced(make_pool, opened):
+    pool = make_pool(maxconn=1)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.closed = 1  # the server went away while it sat idle; close() now raises too
+    fresh = pool.acquire()
+    assert fresh is not conn and len(opened) == 2
+    assert pool.stats()["broken"] == 1
+
+
+@pytest.mark.db
+def test_connection_that_cannot_roll_back_is_discarded(make_pool, opened):
+    pool = make_pool(maxconn=1)
+    with pytest.raises(RuntimeError, match="connection lost"):
+        with pool.connection() as conn:
+            conn.broken_rollback = True
+            raise ValueError("query failed")
+    assert conn.closed and pool.stats()["size"] == 0
+
+
+@pytest.mark.db
+def test_failed_connect_frees_its_slot():
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("could not connect")
+        return _FakeConn()
+
+    pool = ConnectionPool(connect, maxconn=1, timeout=0.05)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    assert pool.stats()["size"] == 0
+    assert pool.acquire() is not None
+
+
+# b.iv — shutdown
+@pytest.mark.db
+def test_closeall_closes_idle_connections(make_pool, opened):
+    pool = make_pool(maxconn=2)
+    held = pool.acquire()
+    pool.release(pool.acquire())
+    pool.closeall()
+    assert opened[1].closed and not held.closed
+    assert pool.stats()["size"] == 1 and pool.stats()["idle"] == 0
+
+
+# c.i — metrics endpoint
+@pytest.mark.web
+def test_pool_stats_endpoint():
+    client = app_module.app.test_client()
+    resp = client.get("/pool-stats")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert {"size", "in_use", "wait_avg_ms", "wait_max_ms", "timeouts"} <= set(body)
+
+
+# c.ii — app.connect() / get_conn()
+@pytest.mark.web
+def test_app_connects_with_pg_variables(monkeypatch):
+    monkeypatch.setenv("PGHOST", "db.example")
+    monkeypatch.setenv("PGPORT", "6543")
+    monkeypatch.delenv("PGDATABASE", raising=False)
+    monkeypatch.setattr(app_module.psycopg2, "connect", lambda **kw: kw)
+    params = app_module.connect()
+    assert params["host"] == "db.example" and params["port"] == 6543
+    assert params["dbname"] == "applicants"
+
+    pool = ConnectionPool(_FakeConn, maxconn=1)
+    monkeypatch.setattr(app_module, "pool", pool)
+    with app_module.get_conn() as conn:
+        assert isinstance(conn, _FakeConn)
+    assert conn.commits == 1 and pool.stats()["idle"] == 1
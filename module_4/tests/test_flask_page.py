@@ -12,6 +12,7 @@ iii. Page text includes “Analysis” and at least one “Answer:”
 import pytest
 import re
 import app as app_module
+import analysis
 
 # ---- Lightweight DB fakes so index page can render without Postgres ----
 class _FakeCursor:
@@ -21,6 +22,10 @@ class _FakeCursor:
     def fetchone(self):
         sql = (getattr(self, "_last_sql", "") or "").lower()
 
+        # the dashboard reads every metric from one aggregate row
+        if "filter (where" in sql:
+            return tuple(3.5 if name.startswith("avg") else 1 for name in analysis.COLUMNS)
+
         # crude rules so the template has numbers to render
         if "count(" in sql:
             return (1,)  # any count -> 1
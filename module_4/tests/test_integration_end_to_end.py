@@ -168,7 +168,7 @@ def memdb(monkeypatch):
 @pytest.fixture
 def app(memdb, monkeypatch):
     # make background job synchronous
-    monkeypatch.setattr(app_module.threading, "Thread", ImmediateThread)
+    monkeypatch.setattr(app_module.jobs.threading, "Thread", ImmediateThread)
 
     # Fake scraper: multiple records
     sample = [
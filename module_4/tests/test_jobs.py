@@ -0,0 +1,466 @@
+"""Background pull jobs (no database or network needed).
+
+a. Job runner
+i. Only one job runs at a time; a second start is refused while busy
+ii. A failing job is reported as failed with its error
+iii. Cancelling stops the job at its next check
+iv. A running job with a limit reports its rate and ETA
+b. Pull pipeline
+i. Cleaned module_2 records map onto the applicants columns
+ii. run_pull hands every scraped row to the loader and counts progress
+iii. Rows are loaded in batches of N while the scrape runs, with a callback per batch
+iv. A batch is also flushed once its oldest row is T seconds old, even while the scraper is stalled
+v. A cancelled pull keeps the batches already loaded
+vi. A pull fails fast while another process holds the pull lock, and always releases its own
+vii. The scraper's state is committed only after the last batch loads
+viii. Rows are standardized through the module_2 service before loading, in chunks
+ix. A scraper error fails the pull; a slow loader holds the scraper back
+x. The real module_2 scraper and cleaner are importable from MODULE2_PATH
+c. Endpoints
+i. GET /pull-data/status reports the last job as JSON
+ii. POST /pull-data/cancel returns 409 when nothing is running
+iii. POST /update-analysis runs while a pull is loading batches
+iv. The page's GET buttons redirect with a message instead of returning JSON
+v. The app's pull job runs the pipeline for the running job and refreshes the cache after each batch
+
+"""
+
+# tests/test_jobs.py
+import io
+import json
+import sys
+import threading
+import time
+import pytest
+import app as app_module
+import jobs
+
+
+class _Record:
+    def __init__(self, data):
+        self.data = data
+
+    def to_dict(self):
+        return dict(self.data)
+
+
+class _FakeScraper:
+    committed = []
+
+    def __init__(self, rows, **options):
+        self.rows = rows
+        self.options = options
+
+    def iter_records(self):
+        yield from self.rows
+
+    def commit_state(self):
+        self.committed.append(len(self.rows))
+
+
+class _FakeClean:
+    @staticmethod
+    def clean_batch(records):
+        return [_Record(rec) for rec in records]
+
+
+class _FakeConn:
+    """Pooled connection stand-in; its cursor answers the pull-lock queries."""
+
+    def __init__(self, lock_free=True, executed=None):
+        self.lock_free = lock_free
+        self.executed = [] if executed is None else executed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+
+    def fetchone(self):
+        return (self.lock_free,)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def _wait(runner, timeout=5):
+    deadline = time.monotonic() + timeout
+    while runner.busy:
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.01)
+
+
+# a.i — single flight
+def test_runner_refuses_second_start_while_busy():
+    runner = jobs.JobRunner()
+    release = threading.Event()
+    job = runner.start(lambda: release.wait(5))
+    assert job is not None and runner.busy
+    assert runner.start(lambda: None) is None
+    release.set()
+    _wait(runner)
+    assert job.state == "succeeded"
+    assert runner.start(lambda: None) is not None
+
+
+# a.ii — failures are reported
+def test_failed_job_reports_error():
+    runner = jobs.JobRunner()
+    finished = []
+    runner.on_finish.append(finished.append)
+
+    def boom():
+        raise RuntimeError("scrape failed")
+
+    job = runner.start(boom)
+    _wait(runner)
+    status = runner.status()
+    assert status["busy"] is False
+    assert status["job"]["state"] == "failed"
+    assert "scrape failed" in status["job"]["error"]
+    assert finished == [job]
+
+
+# a.iii — cancellation
+def test_cancel_stops_job_at_next_check():
+    runner = jobs.JobRunner()
+    started = threading.Event()
+
+    def work():
+        started.set()
+        while True:
+            runner.current.check()
+            time.sleep(0.01)
+
+    job = runner.start(work, limit=10)
+    started.wait(5)
+    assert runner.cancel()
+    _wait(runner)
+    assert job.state == "cancelled" and job.finished is not None
+    assert job.status()["eta"] is None
+
+
+# a.iv — progress estimate
+def test_running_job_reports_rate_and_eta():
+    job = jobs.Job(1, limit=100)
+    job.started -= 10
+    job.fetched = 20
+    status = job.status()
+    assert 1.9 < status["rate"] < 2.1
+    assert 39 < status["eta"] < 41
+
+
+# b.i — record mapping
+def test_applicant_row_maps_cleaned_keys():
+    row = jobs.applicant_row({
+        "result_id": "123", "program": "Computer Science", "university": "Johns Hopkins University",
+        "Notes": "hi", "US/International": "International", "Degree": "Masters", "gpa": 3.9,
+    })
+    assert row["program"] == "Computer Science, Johns Hopkins University"
+    assert row["comments"] == "hi"
+    assert row["us_or_international"] == "International"
+    assert row["degree"] == "Masters"
+    assert row["gpa"] == 3.9 and row["gre"] is None
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Fake module_2 and loader; returns the list of batches handed to load_records."""
+    batches = []
+
+    def use(scraped):
+        monkeypatch.setattr(jobs, "_module_2", lambda: (lambda **kw: _FakeScraper(scraped, **kw), _FakeClean))
+        return batches
+
+    def fake_load(conn, rows, batch_size=None):
+        batches.append(list(rows))
+        return len(rows), len(rows)
+
+    monkeypatch.setattr(_FakeScraper, "committed", [])
+    monkeypatch.setattr(jobs.load_data, "create_schema", lambda conn: None)
+    monkeypatch.setattr(jobs.load_data, "load_records", fake_load)
+    return use
+
+
+def _scraped(n):
+    return [{"result_id": str(i), "program": "CS", "university": "JHU"} for i in range(n)]
+
+
+# b.ii — pipeline wiring
+def test_run_pull_loads_scraped_rows(pipeline):
+    batches = pipeline(_scraped(5))
+    job = jobs.Job(1, limit=5)
+    jobs.run_pull(job, lambda: _FakeConn(), options={"limit": 5}, flush_rows=100)
+
+    loaded = [r for batch in batches for r in batch]
+    assert [r["result_id"] for r in loaded] == ["0", "1", "2", "3", "4"]
+    assert loaded[0]["program"] == "CS, JHU"
+    assert job.fetched == 5 and job.loaded == 5 and job.written == 5
+
+
+# b.iii — micro-batches every N rows
+def test_run_pull_flushes_every_n_rows(pipeline):
+    batches = pipeline(_scraped(5))
+    seen = []
+    job = jobs.Job(1)
+    jobs.run_pull(job, lambda: _FakeConn(), options={}, flush_rows=2, flush_seconds=60,
+                  on_batch=lambda j: seen.append(j.loaded))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert seen == [2, 4, 5]
+
+
+# b.iv — micro-batches every T seconds
+def test_run_pull_flushes_on_age(pipeline):
+    batches = pipeline(_scraped(3))
+    jobs.run_pull(jobs.Job(1), lambda: _FakeConn(), options={}, flush_rows=100, flush_seconds=0)
+    assert [len(b) for b in batches] == [1, 1, 1]
+
+
+class _StalledScraper(_FakeScraper):
+    """Yields its rows, then blocks like a page fetch that never returns until `resume` is set."""
+
+    resume = None
+
+    def iter_records(self):
+        yield from self.rows
+        self.resume.wait(5)
+        yield {"result_id": "late", "program": "CS", "university": "JHU"}
+
+
+# b.iv — the age flush doesn't wait for the next record
+def test_run_pull_flushes_on_age_while_scraper_stalls(pipeline, monkeypatch):
+    batches = pipeline([])
+    resume = threading.Event()
+    monkeypatch.setattr(_StalledScraper, "resume", resume)
+    monkeypatch.setattr(jobs, "_module_2", lambda: (lambda **kw: _StalledScraper(_scraped(2), **kw), _FakeClean))
+    monkeypatch.setattr(jobs, "POLL_SECONDS", 0.02)
+
+    worker = threading.Thread(target=jobs.run_pull, args=(jobs.Job(1), lambda: _FakeConn()),
+                              kwargs={"options": {}, "flush_rows": 100, "flush_seconds": 0.05})
+    worker.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not batches:
+            assert time.monotonic() < deadline, "buffered rows were not flushed during the stall"
+            time.sleep(0.01)
+        assert [r["result_id"] for r in batches[0]] == ["0", "1"]
+    finally:
+        resume.set()
+        worker.join(5)
+    assert [len(b) for b in batches] == [2, 1]
+
+
+# b.v — cancellation keeps committed batches
+def test_cancelled_pull_keeps_loaded_batches(pipeline):
+    batches = pipeline(_scraped(10))
+    job = jobs.Job(1)
+
+    def cancel_after_first(j):
+        j.cancel()
+
+    with pytest.raises(jobs.JobCancelled):
+        jobs.run_pull(job, lambda: _FakeConn(), options={}, flush_rows=3, flush_seconds=60,
+                      on_batch=cancel_after_first)
+    assert [len(b) for b in batches] == [3]
+    assert job.loaded == 3
+
+
+# b.vi — one pull across worker processes
+def test_run_pull_refuses_when_lock_is_held(pipeline):
+    batches = pipeline(_scraped(3))
+    executed = []
+    with pytest.raises(jobs.PullBusy):
+        jobs.run_pull(jobs.Job(1), lambda: _FakeConn(lock_free=False, executed=executed), options={})
+    assert batches == [] and executed == [jobs.PULL_LOCK_SQL]
+
+    executed.clear()
+    jobs.run_pull(jobs.Job(2), lambda: _FakeConn(executed=executed), options={}, flush_rows=100)
+    assert [len(b) for b in batches] == [3]
+    assert executed == [jobs.PULL_LOCK_SQL, jobs.PULL_UNLOCK_SQL]
+
+
+# b.vii — a failed final batch must be fetched again next pull
+def test_state_committed_only_after_last_batch(pipeline, monkeypatch):
+    batches = pipeline(_scraped(30))
+    loaded = []
+
+    def flaky_load(conn, rows, batch_size=None):
+        if len(loaded) == 2:
+            raise RuntimeError("database went away")
+        loaded.append(list(rows))
+        return len(rows), len(rows)
+
+    monkeypatch.setattr(jobs.load_data, "load_records", flaky_load)
+    with pytest.raises(RuntimeError):
+        jobs.run_pull(jobs.Job(1), lambda: _FakeConn(), options={}, flush_rows=10, flush_seconds=60)
+    assert [len(b) for b in loaded] == [10, 10]
+    assert _FakeScraper.committed == []
+
+    monkeypatch.setattr(jobs.load_data, "load_records", lambda conn, rows, batch_size=None: (len(rows), len(rows)))
+    jobs.run_pull(jobs.Job(2), lambda: _FakeConn(), options={}, flush_rows=10, flush_seconds=60)
+    assert _FakeScraper.committed == [30] and batches == []
+
+
+# b.viii — standardizer service
+def test_pull_standardizes_rows_in_chunks(pipeline, monkeypatch):
+    batches = pipeline(_scraped(5))
+    requests = []
+
+    class _Response(io.BytesIO):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    def fake_urlopen(req, timeout=None):
+        rows = json.loads(req.data)["rows"]
+        requests.append((req.full_url, len(rows)))
+        out = [{"llm-generated-program": r["program"].split(",")[0], "llm-generated-university": "jhu"}
+               for r in rows]
+        return _Response(json.dumps({"rows": out}).encode("utf-8"))
+
+    monkeypatch.setattr(jobs.urllib.request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(jobs, "STANDARDIZE_BATCH", 2)
+    job = jobs.Job(1)
+    jobs.run_pull(job, lambda: _FakeConn(), options={}, standardizer_url="http://llm:8000/",
+                  flush_rows=100, flush_seconds=60)
+    assert requests == [("http://llm:8000/standardize", 2)] * 2 + [("http://llm:8000/standardize", 1)]
+    assert job.standardized == 5
+    assert batches[0][0]["llm_generated_program"] == "CS"
+    assert batches[0][0]["llm_generated_university"] == "jhu"
+
+
+class _FailingScraper(_FakeScraper):
+    def iter_records(self):
+        yield from self.rows
+        raise ConnectionError("survey page unreachable")
+
+
+# b.ix — errors and back-pressure between scraper and loader
+def test_scraper_error_fails_pull(pipeline, monkeypatch):
+    batches = pipeline([])
+    monkeypatch.setattr(jobs, "_module_2", lambda: (lambda **kw: _FailingScraper(_scraped(3), **kw), _FakeClean))
+    with pytest.raises(ConnectionError):
+        jobs.run_pull(jobs.Job(1), lambda: _FakeConn(), options={}, flush_rows=2, flush_seconds=60)
+    assert [len(b) for b in batches] == [2]
+    assert _FakeScraper.committed == []
+
+
+def test_slow_loader_holds_back_scraper(pipeline, monkeypatch):
+    batches = pipeline(_scraped(4))
+    monkeypatch.setattr(jobs, "POLL_SECONDS", 0.005)
+
+    def slow_load(conn, rows, batch_size=None):
+        time.sleep(0.03)
+        batches.append(list(rows))
+        return len(rows), len(rows)
+
+    monkeypatch.setattr(jobs.load_data, "load_records", slow_load)
+    job = jobs.Job(1)
+    jobs.run_pull(job, lambda: _FakeConn(), options={}, flush_rows=1, flush_seconds=60)
+    assert [len(b) for b in batches] == [1, 1, 1, 1] and job.loaded == 4
+
+
+# b.x — the real module_2 modules
+def test_module_2_is_importable(monkeypatch):
+    monkeypatch.setattr(sys, "path", [p for p in sys.path if "module_2" not in p])
+    scrape_data, clean_data = jobs._module_2()
+    assert scrape_data.__name__ == "scrape_data" and hasattr(scrape_data, "commit_state")
+    assert hasattr(clean_data, "clean_batch")
+
+
+# c.i — status endpoint
+@pytest.mark.web
+def test_status_endpoint_reports_last_job(monkeypatch):
+    runner = jobs.JobRunner()
+    monkeypatch.setattr(app_module, "runner", runner)
+    runner.start(lambda: None, limit=3)
+    _wait(runner)
+    body = app_module.app.test_client().get("/pull-data/status").get_json()
+    assert body["busy"] is False
+    assert body["job"]["state"] == "succeeded" and body["job"]["limit"] == 3
+
+
+# c.ii — cancel with nothing running
+@pytest.mark.web
+def test_cancel_endpoint_conflict_when_idle(monkeypatch):
+    monkeypatch.setattr(app_module, "runner", jobs.JobRunner())
+    resp = app_module.app.test_client().post("/pull-data/cancel")
+    assert resp.status_code == 409
+    assert resp.get_json()["cancelled"] is False
+
+
+# c.iii — partial progress is visible during a pull
+@pytest.mark.web
+def test_update_analysis_allowed_while_pull_runs(monkeypatch):
+    runner = jobs.JobRunner()
+    monkeypatch.setattr(app_module, "runner", runner)
+    updated = []
+    monkeypatch.setattr(app_module, "run_update_job", lambda: updated.append(True))
+    release = threading.Event()
+    runner.start(lambda: release.wait(5))
+    try:
+        resp = app_module.app.test_client().post("/update-analysis")
+        assert resp.status_code == 200 and updated == [True]
+        assert resp.get_json()["busy"] is True
+        assert app_module.app.test_client().post("/pull-data").status_code == 409
+    finally:
+        release.set()
+        _wait(runner)
+
+
+# c.iv — the dashboard's GET forms
+@pytest.mark.web
+def test_get_buttons_redirect_with_messages(monkeypatch):
+    runner = jobs.JobRunner()
+    monkeypatch.setattr(app_module, "runner", runner)
+    monkeypatch.setattr(app_module, "run_update_job", lambda: None)
+    client = app_module.app.test_client()
+
+    def flashed(resp):
+        assert resp.status_code == 302
+        with client.session_transaction() as session:
+            return [message for _, message in session.pop("_flashes", [])]
+
+    assert flashed(client.get("/pull-data/cancel")) == ["No pull is running."]
+    assert flashed(client.get("/update-analysis")) == ["Analysis updated."]
+
+    release = threading.Event()
+    runner.start(lambda: release.wait(5))
+    try:
+        assert flashed(client.get("/pull-data")) == ["A pull is already running, please wait."]
+        assert "rows loaded so far" in flashed(client.get("/update-analysis"))[0]
+        assert flashed(client.get("/pull-data/cancel")) == ["Cancelling the running pull."]
+    finally:
+        release.set()
+        _wait(runner)
+
+
+# c.v — app.scrape_job wiring
+@pytest.mark.web
+def test_scrape_job_runs_pull_for_current_job(monkeypatch):
+    runner = jobs.JobRunner()
+    monkeypatch.setattr(app_module, "runner", runner)
+    invalidated, calls = [], []
+    monkeypatch.setattr(app_module.analysis_cache, "invalidate", lambda: invalidated.append(True))
+
+    def fake_run_pull(job, get_conn, on_batch=None):
+        calls.append((job, get_conn))
+        on_batch(job)
+
+    monkeypatch.setattr(jobs, "run_pull", fake_run_pull)
+    job = runner.start(app_module.scrape_job)
+    _wait(runner)
+    assert calls == [(job, app_module.get_conn)]
+    assert job.state == "succeeded" and invalidated == [True]
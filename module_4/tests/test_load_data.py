@@ -0,0 +1,390 @@
+"""Loader and query script checks that run without a database.
+
+a. Streaming readers
+i. JSON arrays and JSON Lines stream the same records as json.load
+ii. Partitions of a JSON Lines file cover every line exactly once
+iii. Empty files load nothing and malformed JSON arrays are rejected
+b. Upsert rows
+i. Rows are keyed on result_id (falling back to the result URL) and deduplicated per batch
+ii. Low-cardinality columns are stored in one canonical spelling
+iii. Rows from before result_id are backfilled from their URL before the unique index is built, only while upgrading an old table
+iv. The insert loader sends one multi-row upsert per batch; unparseable numbers become NULL
+c. Query script
+i. answers() runs one aggregate query, returns every expected key, and report() formats percentages with two decimals
+ii. The query_data CLI prints every answer, from the summary table or (--scan) a full scan
+d. Load CLI
+i. load_file creates the schema, loads in committed batches, refreshes statistics and signals the shared cache
+ii. Partitioned loads split a JSON Lines file across connections
+iii. main() reports the load (and any duplicates removed) and rejects unknown modes
+
+"""
+
+# tests/test_load_data.py
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+import analysis
+import load_data
+import query_data
+
+RECORDS = [
+    {"result_id": str(1000 + i), "program": f"Program {i % 7}", "status": "Accepted",
+     "term": "Fall 2025", "gpa": "3.5" if i % 3 else "n/a", "comments": "tab\there\nnewline"}
+    for i in range(250)
+]
+
+
+@pytest.fixture
+def json_file(tmp_path):
+    path = tmp_path / "applicants.json"
+    path.write_text(json.dumps(RECORDS, indent=2), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def jsonl_file(tmp_path):
+    path = tmp_path / "applicants.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in RECORDS) + "\n", encoding="utf-8")
+    return str(path)
+
+
+# a.i — streaming readers match json.load for any chunk size
+@pytest.mark.db
+@pytest.mark.parametrize("chunk_size", [1, 17, 1 << 20])
+def test_json_array_streams_all_records(json_file, chunk_size):
+    assert list(load_data.iter_json_array(json_file, chunk_size)) == RECORDS
+
+
+@pytest.mark.db
+def test_jsonl_and_sniffing(jsonl_file, tmp_path):
+    assert list(load_data.iter_records(jsonl_file)) == RECORDS
+    # JSON Lines saved under a .json name is detected by content
+    renamed = tmp_path / "out.json"
+    renamed.write_bytes(open(jsonl_file, "rb").read())
+    assert list(load_data.iter_records(str(renamed))) == RECORDS
+
+
+@pytest.mark.db
+def test_truncated_json_array_raises(tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps(RECORDS)[:-40], encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(load_data.iter_json_array(str(path), 64))
+
+
+# a.iii — empty and malformed input
+@pytest.mark.db
+def test_empty_and_malformed_files(tmp_path):
+    empty = tmp_path / "empty.jsonl"
+    empty.write_bytes(b"")
+    assert list(load_data.iter_jsonl(str(empty))) == []
+    for text in ('{"result_id": "1"}', "   "):
+        path = tmp_path / "bad.json"
+        path.write_text(text, encoding="utf-8")
+        with pytest.raises(ValueError):
+            list(load_data.iter_json_array(str(path)))
+
+
+@pytest.mark.db
+def test_batches_are_bounded():
+    assert [len(b) for b in load_data.batched(range(2500), 1000)] == [1000, 1000, 500]
+
+
+# a.ii — partitions cover the file exactly once
+@pytest.mark.db
+@pytest.mark.parametrize("partitions", [1, 3, 8, 1000])
+def test_partitions_cover_every_line_once(jsonl_file, partitions):
+    ranges = load_data.partition_offsets(jsonl_file, partitions)
+    assert len(ranges) <= partitions
+    seen = [rec for start, end in ranges for rec in load_data.iter_jsonl(jsonl_file, start, end)]
+    assert seen == RECORDS
+
+
+# b.i — rows are keyed on result_id and deduplicated per batch
+@pytest.mark.db
+def test_dedupe_keeps_last_record_per_result_id():
+    batch = [
+        {"result_id": "1", "gpa": "3.0"},
+        {"url": "https://www.thegradcafe.com/result/2"},
+        {"result_id": "1", "gpa": "4.0"},
+        {"program": "no id"},
+    ]
+    rows = load_data.dedupe(batch)
+    ids = [r[0] for r in rows]
+    assert sorted(i for i in ids if i) == ["1", "2"]
+    assert ids.count(None) == 1
+    gpa = load_data.COLUMNS.index("gpa")
+    assert next(r for r in rows if r[0] == "1")[gpa] == 4.0
+
+
+@pytest.mark.db
+def test_copy_batch_streams_escaped_rows_into_staging():
+    class Cur:
+        rowcount = 3
+
+        def __init__(self):
+            self.sql, self.copied = [], None
+
+        def execute(self, sql, params=None):
+            self.sql.append(sql)
+
+        def copy_expert(self, sql, f):
+            self.sql.append(sql)
+            self.copied = f.read()
+
+    cur = Cur()
+    assert load_data.copy_batch(cur, RECORDS[:3]) == 3
+    lines = cur.copied.splitlines()
+    assert len(lines) == 3
+    fields = lines[0].split("\t")
+    assert len(fields) == len(load_data.COLUMNS)
+    assert "tab\\there\\nnewline" in fields
+    assert "\\N" in lines[0]  # gpa "n/a" -> NULL
+    assert any("ON CONFLICT (result_id)" in s for s in cur.sql)
+
+
+# b.iv — insert mode
+@pytest.mark.db
+def test_insert_batch_sends_one_upsert():
+    class Cur:
+        connection = SimpleNamespace(encoding="UTF8")
+        rowcount = 2
+
+        def __init__(self):
+            self.sql, self.rows = [], []
+
+        def mogrify(self, template, args):
+            self.rows.append(args)
+            return b"(" + b",".join(b"%r" % (a,) for a in args) + b")"
+
+        def execute(self, sql, params=None):
+            self.sql.append(sql)
+
+    cur = Cur()
+    batch = [dict(RECORDS[0]), dict(RECORDS[1], gpa="three point five")]
+    assert load_data.insert_batch(cur, batch) == 2
+    assert len(cur.sql) == 1 and b"ON CONFLICT (result_id)" in cur.sql[0]
+    gpa = load_data.COLUMNS.index("gpa")
+    assert [row[gpa] for row in cur.rows] == [None, None]  # "n/a" and unparseable text
+
+
+class _LoadCursor:
+    rowcount = 0
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.sql.append(sql)
+
+    def copy_expert(self, sql, f):
+        self.conn.sql.append(sql)
+        self.rowcount = len(f.read().splitlines())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _LoadConn:
+    def __init__(self, dsn=None):
+        self.dsn = dsn
+        self.sql = []
+        self.commits = 0
+        self.closed = False
+
+    def cursor(self):
+        return _LoadCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Every connect() returns a recording fake; returns the list of connections opened."""
+    conns = []
+
+    def connect(dsn=None):
+        conns.append(_LoadConn(dsn))
+        return conns[-1]
+
+    monkeypatch.setattr(load_data, "connect", connect)
+    monkeypatch.setattr(load_data, "create_schema", lambda conn: 0)
+    monkeypatch.delenv("ANALYSIS_CACHE_DB", raising=False)
+    return conns
+
+
+# d.i — a single-connection load
+@pytest.mark.db
+def test_load_file_loads_batches_and_signals_cache(fake_db, json_file, tmp_path, monkeypatch):
+    signalled = []
+    monkeypatch.setenv("ANALYSIS_CACHE_DB", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(load_data, "invalidate_shared", signalled.append)
+    stats = load_data.load_file(json_file, "postgresql:///x", batch_size=100)
+    assert stats["rows"] == stats["written"] == len(RECORDS) and stats["deduplicated"] == 0
+    (conn,) = fake_db
+    assert conn.dsn == "postgresql:///x" and conn.closed
+    assert conn.commits == 4  # three batches, then ANALYZE
+    assert "ANALYZE applicants;" in conn.sql
+    assert signalled == [str(tmp_path / "cache.db")]
+
+
+# d.ii — partitions load over their own connections
+@pytest.mark.db
+def test_partitioned_load_uses_a_connection_per_partition(fake_db, jsonl_file, monkeypatch):
+    # threads stand in for worker processes so the fakes are shared
+    monkeypatch.setattr(load_data, "ProcessPoolExecutor", ThreadPoolExecutor)
+    stats = load_data.load_file(jsonl_file, partitions=3, batch_size=1000)
+    assert stats["rows"] == len(RECORDS)
+    assert len(fake_db) == 4 and all(c.closed for c in fake_db)
+    assert sum(c.commits for c in fake_db[1:]) == 3
+
+
+# d.iii — the CLI
+@pytest.mark.db
+def test_main_reports_load(fake_db, jsonl_file, monkeypatch, capsys):
+    monkeypatch.setattr(load_data, "create_schema", lambda conn: 3)
+    assert load_data.main([jsonl_file, "--mode", "copy", "--batch-size", "500"]) == 0
+    out = capsys.readouterr().out
+    assert "removed 3 duplicate rows" in out
+    assert f"Read {len(RECORDS)} rows" in out and "copy" in out
+    with pytest.raises(ValueError):
+        load_data.load_file(jsonl_file, mode="bulk")
+
+
+@pytest.mark.db
+def test_connect_uses_database_url(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgresql:///applicants")
+    monkeypatch.setattr(load_data.psycopg2, "connect", lambda dsn: dsn)
+    assert load_data.connect() == "postgresql:///applicants"
+    assert load_data.connect("postgresql:///other") == "postgresql:///other"
+
+
+# c.i — query script answers everything in one query and formats percentages
+@pytest.mark.db
+def test_query_answers_and_report():
+    class Cur:
+        executed = 0
+
+        def execute(self, sql, params=None):
+            self.executed += 1
+            self.last = sql
+
+        def fetchone(self):
+            return tuple(3.25 if name.startswith("avg") else 4 for name in analysis.COLUMNS)
+
+    cur = Cur()
+    a = query_data.answers(cur)
+    assert cur.executed == 2  # the summary-table check, then one round trip for every metric
+    assert "FILTER (WHERE" in cur.last
+    assert {"q1", "pct_intl", "avg_gpa", "pct_fall_accept", "rejected"} <= set(a)
+    lines = query_data.report(a)
+    assert len(lines) == 10
+    assert "100.00%" in lines[1]
+
+
+# b.ii — status/origin/degree/term variants collapse to one spelling
+@pytest.mark.db
+def test_low_cardinality_values_are_canonical():
+    row = load_data.row_values({
+        "result_id": "9", "status": " accepted ", "us_or_international": "US",
+        "degree": "Ph.D.", "term": "fall  2025", "program": "Unknown Program",
+    })
+    col = load_data.COLUMNS.index
+    assert row[col("status")] == "Accepted"
+    assert row[col("us_or_international")] == "American"
+    assert row[col("degree")] == "PhD"
+    assert row[col("term")] == "Fall 2025"
+    assert row[col("program")] == "Unknown Program"
+    assert load_data.canonical("degree", "Certificate") == "Certificate"
+
+
+# b.iii — legacy rows are backfilled, once, while upgrading an old table
+@pytest.mark.db
+@pytest.mark.parametrize("upgraded, legacy", [(False, True), (False, False), (True, False)])
+def test_create_schema_backfills_legacy_rows_first(upgraded, legacy, monkeypatch):
+    monkeypatch.setattr(load_data, "create_summary", lambda cur: None)
+    rebuilt = []
+    monkeypatch.setattr(load_data, "rebuild_summary", rebuilt.append)
+
+    class Cur:
+        rowcount = 2
+
+        def __init__(self):
+            self.sql = []
+
+        def execute(self, sql, params=None):
+            self.sql.append(sql)
+
+        def fetchone(self):
+            if self.sql[-1] == load_data.UPGRADE_CHECK_SQL:
+                return (upgraded, upgraded)
+            if "to_regclass('applicants_summary')" in self.sql[-1]:
+                return (not upgraded,)  # a new table gets its summary built once
+            return (legacy,) if self.sql[-1] == load_data.LEGACY_SQL else (False,)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    class Conn:
+        cur = Cur()
+
+        def cursor(self):
+            return self.cur
+
+        def commit(self):
+            pass
+
+    conn = Conn()
+    removed = load_data.create_schema(conn)
+    sql = conn.cur.sql
+    assert removed == (2 if legacy else 0)
+    assert rebuilt == ([] if upgraded else [conn])
+    assert (load_data.DEDUPE_SQL in sql) is legacy
+    assert (load_data.BACKFILL_SQL in sql) is legacy
+    # an upgraded table takes no ALTER TABLE lock and no full-table scan
+    for step in (load_data.ADD_RESULT_ID_SQL, load_data.LEGACY_SQL, load_data.INDEXES):
+        assert (step in sql) is not upgraded
+    if not upgraded:
+        assert sql.index(load_data.INDEXES) > sql.index(load_data.LEGACY_SQL)
+    assert load_data.OLD_INDEXES in sql
+    assert "applicants_result_id_key" in load_data.INDEXES
+
+
+# c.ii — query_data CLI
+@pytest.mark.db
+@pytest.mark.parametrize("argv, query", [([], analysis.SUMMARY_SQL), (["--scan"], analysis.ANALYSIS_SQL)])
+def test_query_data_main_prints_answers(monkeypatch, capsys, argv, query):
+    class Cur:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def execute(self, sql, params=None):
+            self.conn.sql.append(sql)
+
+        def fetchone(self):
+            return tuple(3.25 if name.startswith("avg") else 4 for name in analysis.COLUMNS)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    conn = _LoadConn()
+    conn.cursor = lambda: Cur(conn)
+    monkeypatch.setattr(query_data, "connect", lambda dsn=None: conn)
+    assert query_data.main(argv) == 0
+    assert conn.sql[-1] == query and conn.closed
+    out = capsys.readouterr().out
+    assert "1) Entries applied for Fall 2025: 4" in out and "10) Entries rejected" in out
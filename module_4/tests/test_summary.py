@@ -0,0 +1,299 @@
+"""Summary table used by the dashboard and query_data.
+
+a. Metric definitions
+i. Every metric filter only uses columns kept in applicants_summary
+ii. create_summary only creates triggers that are missing and never drops them
+iii. Databases without the summary table yet (loaded by module_3) are answered by a full scan
+iv. check_summary() names metrics that drift from a full scan; the CLI rebuilds and checks (exit 1 on drift)
+b. Incremental maintenance (needs PostgreSQL; skipped unless DATABASE_URL is set)
+i. After inserts, re-loads with changed rows, and deletes, summary answers equal a full scan
+ii. rebuild_summary() reproduces the incrementally maintained table
+iii. Concurrent loads over separate connections keep the summary exact
+c. Legacy rows (needs PostgreSQL)
+i. Rows loaded before result_id existed get it from their URL, duplicates collapse, and re-loads no longer duplicate them
+
+"""
+
+# tests/test_summary.py
+import os
+import re
+import threading
+import uuid
+import pytest
+import analysis
+import load_data
+import summary
+
+SQL_WORDS = {"and", "or", "in", "is", "not", "null"}
+
+
+# a.i — filters reference only summary dimensions
+@pytest.mark.analysis
+def test_metric_filters_use_summary_dimensions():
+    for name, kind, column, where in analysis.METRICS:
+        if kind == "avg":
+            assert column in summary.MEASURES, name
+        if where:
+            unquoted = re.sub(r"'[^']*'", "", where)
+            words = {w.lower() for w in re.findall(r"[A-Za-z_]+", unquoted)}
+            assert words - SQL_WORDS <= set(summary.DIMENSIONS), name
+    assert "applicants_summary" in analysis.SUMMARY_SQL
+    assert "FROM applicants\n" not in analysis.SUMMARY_SQL
+
+
+class _SchemaCursor:
+    """Records executed SQL; pg_trigger reports `existing` as already installed."""
+
+    def __init__(self, existing):
+        self.existing = existing
+        self.sql = []
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.sql.append(sql)
+        if "pg_trigger" in sql:
+            self.rows = [(name,) for name in params[0] if name not in self.existing]
+
+    def fetchall(self):
+        return self.rows
+
+
+# a.ii — no DROP TRIGGER / CREATE TRIGGER on every create_schema
+@pytest.mark.analysis
+@pytest.mark.parametrize("existing", [(), ("applicants_summary_ins",), tuple(summary.TRIGGERS)])
+def test_create_summary_only_adds_missing_triggers(existing):
+    cur = _SchemaCursor(set(existing))
+    summary.create_summary(cur)
+    assert not any("DROP TRIGGER" in sql for sql in cur.sql)
+    created = [sql.split()[2] for sql in cur.sql if sql.startswith("CREATE TRIGGER")]
+    assert created == [name for name in summary.TRIGGERS if name not in existing]
+    assert "pg_advisory_xact_lock" in summary.SUMMARY_SCHEMA
+
+
+class _AnalysisCursor:
+    def __init__(self, summary_exists):
+        self.summary_exists = summary_exists
+        self.sql = []
+
+    def execute(self, sql, params=None):
+        self.sql.append(sql)
+
+    def fetchone(self):
+        if self.sql[-1] == analysis.SUMMARY_EXISTS_SQL:
+            return (self.summary_exists,)
+        return tuple(1 for _ in analysis.COLUMNS)
+
+
+# a.iii — no UndefinedTable before the first load or pull
+@pytest.mark.analysis
+@pytest.mark.parametrize("exists, query", [(True, analysis.SUMMARY_SQL), (False, analysis.ANALYSIS_SQL)])
+def test_compute_falls_back_to_scan_without_summary(exists, query):
+    cur = _AnalysisCursor(exists)
+    assert analysis.compute(cur)["total"] == 1
+    assert cur.sql == [analysis.SUMMARY_EXISTS_SQL, query]
+
+    cur = _AnalysisCursor(exists)
+    analysis.compute(cur, summary=False)
+    assert cur.sql == [analysis.ANALYSIS_SQL]
+
+
+class _SummaryConn:
+    """Answers the summary and scan queries with the given rows; records commits and rollbacks."""
+
+    def __init__(self, fast, scan):
+        self.answers = {analysis.SUMMARY_EXISTS_SQL: (True,), analysis.SUMMARY_SQL: fast,
+                        analysis.ANALYSIS_SQL: scan, "SELECT COUNT(*) FROM applicants_summary": (7,)}
+        self.sql = []
+        self.ended = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.sql.append(sql)
+
+    def fetchone(self):
+        return self.answers[self.sql[-1]]
+
+    def fetchall(self):
+        return []
+
+    def commit(self):
+        self.ended.append("commit")
+
+    def rollback(self):
+        self.ended.append("rollback")
+
+    def close(self):
+        self.ended.append("close")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _row(**changes):
+    values = dict.fromkeys(analysis.COLUMNS, 10)
+    values.update({"avg_gpa": 3.5, "avg_gre": None, **changes})
+    return tuple(values[name] for name in analysis.COLUMNS)
+
+
+# a.iv — drift check and CLI
+@pytest.mark.analysis
+def test_check_summary_and_cli(monkeypatch, capsys):
+    exact = _SummaryConn(_row(avg_gpa=3.5 + 1e-12), _row())
+    assert summary.check_summary(exact) == [] and exact.ended == ["rollback"]
+    drifted = _SummaryConn(_row(rejected=9, avg_gre=320.0), _row())
+    assert summary.check_summary(drifted) == ["avg_gre", "rejected"]
+
+    conns = iter([_SummaryConn(_row(), _row()), drifted, _SummaryConn(_row(), _row())])
+    monkeypatch.setattr(load_data, "connect", lambda dsn=None: next(conns))
+    assert summary.main(["check"]) == 0
+    assert summary.main(["check", "--dsn", "postgresql:///x"]) == 1
+    assert "Summary differs for: avg_gre, rejected" in capsys.readouterr().out
+    assert summary.main(["rebuild"]) == 0
+    assert "Rebuilt applicants_summary: 7 rows." in capsys.readouterr().out
+
+
+@pytest.fixture
+def conn():
+    if not (os.environ.get("DATABASE_URL") or os.environ.get("PGTEST")):
+        pytest.skip("no PostgreSQL server configured (set DATABASE_URL)")
+    try:
+        c = load_data.connect()
+    except Exception as exc:  # server configured but unreachable
+        pytest.skip(f"cannot connect to PostgreSQL: {exc}")
+    schema = f"summary_test_{uuid.uuid4().hex[:8]}"
+    with c.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {schema}; SET search_path TO {schema};")
+    c.commit()
+    try:
+        yield c
+    finally:
+        c.rollback()
+        with c.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {schema} CASCADE;")
+        c.commit()
+        c.close()
+
+
+def _records(n, shift=0):
+    terms = ["Fall 2025", "Spring 2026", None]
+    statuses = ["Accepted", "Rejected", "Interview"]
+    return [
+        {
+            "result_id": str(i),
+            "term": terms[(i + shift) % 3],
+            "status": statuses[i % 3],
+            "us_or_international": "American" if i % 2 else "International",
+            "degree": "PhD" if i % 4 else "Masters",
+            "gpa": None if i % 5 == 0 else 2.5 + ((i + shift) % 15) / 10,
+            "gre": 300 + i % 40,
+            "llm_generated_university": "georgetown" if i % 7 == 0 else "jhu",
+            "llm_generated_program": "computer science",
+        }
+        for i in range(n)
+    ]
+
+
+# b.i / b.ii — exact under re-loads and rebuilds
+@pytest.mark.db
+@pytest.mark.parametrize("mode", ["copy", "insert"])
+def test_summary_matches_full_scan(conn, mode):
+    load_data.create_schema(conn)
+    load_data.load_records(conn, _records(600), mode=mode, batch_size=128)
+    assert summary.check_summary(conn) == []
+
+    # re-load: half the rows change term/gpa, the rest are identical
+    load_data.load_records(conn, _records(300, shift=1) + _records(600)[300:], mode=mode)
+    assert summary.check_summary(conn) == []
+
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM applicants WHERE result_id::int % 11 = 0")
+    conn.commit()
+    assert summary.check_summary(conn) == []
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT * FROM applicants_summary ORDER BY 1, 2, 3, 4, 5, 6")
+        incremental = cur.fetchall()
+    summary.rebuild_summary(conn)
+    with conn.cursor() as cur:
+        cur.execute("SELECT * FROM applicants_summary ORDER BY 1, 2, 3, 4, 5, 6")
+        assert cur.fetchall() == incremental
+
+
+# c.i — backfill of rows from before result_id
+@pytest.mark.db
+def test_legacy_rows_are_backfilled_and_deduplicated(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE applicants (
+                p_id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                program TEXT, comments TEXT, date_added DATE, url TEXT, status TEXT, term TEXT,
+                us_or_international TEXT, gpa FLOAT, gre FLOAT, gre_v FLOAT, gre_aw FLOAT, degree TEXT,
+                llm_generated_program TEXT, llm_generated_university TEXT
+            );
+            INSERT INTO applicants (url, status, term) VALUES
+                ('https://www.thegradcafe.com/result/1', 'accepted', 'Fall 2025'),
+                ('https://www.thegradcafe.com/result/1', 'accepted', 'Fall 2025'),
+                ('https://www.thegradcafe.com/result/2', 'Rejected', 'Fall 2025'),
+                (NULL, 'Rejected', 'Fall 2025');
+        """)
+    conn.commit()
+    assert load_data.create_schema(conn) == 1  # the duplicate of result 1
+    with conn.cursor() as cur:
+        cur.execute("SELECT result_id, count(*) FROM applicants GROUP BY 1 ORDER BY 1")
+        assert cur.fetchall() == [("1", 1), ("2", 1), (None, 1)]
+    assert load_data.create_schema(conn) == 0  # upgraded once
+
+    load_data.load_records(conn, [
+        {"result_id": "1", "url": "https://www.thegradcafe.com/result/1", "status": "accepted", "term": "Fall 2025"},
+        {"result_id": "2", "url": "https://www.thegradcafe.com/result/2", "status": "Rejected", "term": "Fall 2025"},
+    ])
+    with conn.cursor() as cur:
+        cur.execute("SELECT result_id, status FROM applicants WHERE result_id IS NOT NULL ORDER BY 1")
+        assert cur.fetchall() == [("1", "Accepted"), ("2", "Rejected")]
+    assert summary.check_summary(conn) == []
+
+
+# b.iii — partitioned loads upsert from several connections at once
+@pytest.mark.db
+def test_concurrent_loads_keep_summary_exact(conn):
+    load_data.create_schema(conn)
+    with conn.cursor() as cur:
+        cur.execute("SELECT oid FROM pg_trigger WHERE tgrelid = 'applicants'::regclass ORDER BY 1")
+        triggers = cur.fetchall()
+        cur.execute("SHOW search_path")
+        search_path = cur.fetchone()[0]
+    conn.commit()
+
+    rows = _records(2000)
+    errors = []
+
+    def load(part):
+        c = load_data.connect()
+        try:
+            with c.cursor() as cur:
+                cur.execute(f"SET search_path TO {search_path}")
+            c.commit()
+            load_data.create_schema(c)
+            # overlapping halves hit the same summary rows from both sides
+            load_data.load_records(c, rows[part::2] + rows[:200], batch_size=64)
+        except Exception as exc:  # surfaced below; a deadlock lands here
+            errors.append(exc)
+        finally:
+            c.close()
+
+    workers = [threading.Thread(target=load, args=(part,)) for part in range(2)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    assert errors == []
+    assert summary.check_summary(conn) == []
+    with conn.cursor() as cur:
+        cur.execute("SELECT oid FROM pg_trigger WHERE tgrelid = 'applicants'::regclass ORDER BY 1")
+        assert cur.fetchall() == triggers